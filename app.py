@@ -1,18 +1,153 @@
 import os
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from werkzeug.datastructures import MultiDict
 import requests
-from collections import defaultdict
-from datetime import datetime, timedelta
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, date, time, timedelta
+from functools import lru_cache, wraps
+from time import monotonic, sleep
+import fcntl
 import json
+import math
+import queue
+import random
+import re
+import sys
+import tempfile
+import threading
+import uuid
+import click
+import numpy as np
+import pyarrow as pa
 
 app = Flask(__name__)
 CORS(app)
 
 VERDI_API_KEY = os.environ.get("VERDI_API_KEY")
 
-
-def getData(start_date, end_date, filter_by):
+# Cache lifetimes (seconds) for ranges that include today vs. closed past ranges
+REPORT_CACHE_TTL = int(os.environ.get("REPORT_CACHE_TTL", 300))
+PAST_REPORT_CACHE_TTL = int(os.environ.get("PAST_REPORT_CACHE_TTL", 86400))
+REPORT_CACHE_MAX_ENTRIES = int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", 4096))
+
+# Incremental maintenance of today's window: delta fetches every
+# TODAY_SYNC_INTERVAL seconds, a full resync every TODAY_FULL_SYNC_INTERVAL
+TODAY_SYNC_INTERVAL = int(os.environ.get("TODAY_SYNC_INTERVAL", 60))
+TODAY_FULL_SYNC_INTERVAL = int(os.environ.get("TODAY_FULL_SYNC_INTERVAL", 900))
+TODAY_DELTA_OVERLAP = int(os.environ.get("TODAY_DELTA_OVERLAP", 120))
+
+# On-disk snapshots of closed days ("" disables). Days within
+# SNAPSHOT_SETTLE_DAYS of today are still changing and always fetched live.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_SETTLE_DAYS = int(os.environ.get("SNAPSHOT_SETTLE_DAYS", 1))
+SNAPSHOT_COMPACT_AFTER_DAYS = int(os.environ.get("SNAPSHOT_COMPACT_AFTER_DAYS", 31))
+SNAPSHOT_RETENTION_DAYS = int(os.environ.get("SNAPSHOT_RETENTION_DAYS", 0))  # 0 = keep
+SNAPSHOT_COMPRESSION = os.environ.get("SNAPSHOT_COMPRESSION", "zstd")
+
+# Period-over-period comparisons; per-day rollups of settled days never change
+COMPARE_TO = ("previous_period", "previous_year")
+DAY_ROLLUP_TTL = int(os.environ.get("DAY_ROLLUP_TTL", 7 * 86400))
+ROLLUP_CACHE_MAX_ENTRIES = int(os.environ.get("ROLLUP_CACHE_MAX_ENTRIES", 4096))
+
+# Asynchronous report jobs: a bounded queue drained by in-process workers.
+# Queued jobs nobody polled for REPORT_JOB_ABANDON_AFTER seconds are dropped.
+REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", 2))
+REPORT_JOB_QUEUE_SIZE = int(os.environ.get("REPORT_JOB_QUEUE_SIZE", 16))
+REPORT_JOB_ABANDON_AFTER = int(os.environ.get("REPORT_JOB_ABANDON_AFTER", 120))
+REPORT_JOB_TTL = int(os.environ.get("REPORT_JOB_TTL", 3600))
+REPORT_JOB_RETRY_AFTER = 30
+
+# Fallbacks for pickup addresses that match no area alias: nearest centroid
+# (when the order has pickup coordinates), then one-edit fuzzy alias match
+AREA_MAX_DISTANCE_KM = float(os.environ.get("AREA_MAX_DISTANCE_KM", 5))
+AREA_GRID_CELL_DEGREES = 0.02  # about 2 km
+AREA_FUZZY_MIN_LENGTH = 5  # shorter aliases are too ambiguous to fuzz
+PICKUP_COORDINATE_KEYS = [("latitude", "longitude"), ("lat", "lng"), ("lat", "lon")]
+
+# Background warming of today's/yesterday's default reports (0 disables it)
+CACHE_WARM_INTERVAL = int(os.environ.get("CACHE_WARM_INTERVAL", 240))
+CACHE_WARM_JITTER = int(os.environ.get("CACHE_WARM_JITTER", 30))
+CACHE_WARM_LOCK_FILE = os.environ.get(
+    "CACHE_WARM_LOCK_FILE",
+    os.path.join(tempfile.gettempdir(), "reports-cache-warm.lock"),
+)
+# Orders the lock holder fetched, shared with the other workers on this host
+CACHE_WARM_DATA_DIR = os.environ.get(
+    "CACHE_WARM_DATA_DIR",
+    os.path.join(tempfile.gettempdir(), "reports-cache-warm"),
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Supported chart granularities; minute-based ones map to their bucket width
+CHART_GRANULARITIES = {
+    "15min": 15,
+    "30min": 30,
+    "hour": 60,
+    "weekday": None,
+    "date": None,
+    "heatmap": None,
+}
+
+
+class ExpiringCache:
+    """Entries expire after their own TTL; past max_entries the least recently
+    used entry is evicted, so long-lived entries can't crowd out fresh ones."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+_cache = ExpiringCache(REPORT_CACHE_MAX_ENTRIES)
+
+
+def cache_get(key):
+    return _cache.get(key)
+
+
+def cache_set(key, value, ttl):
+    _cache.set(key, value, ttl)
+
+
+def last_closed_day():
+    """Latest day that has settled; later days can still change upstream."""
+    return date.today() - timedelta(days=SNAPSHOT_SETTLE_DAYS + 1)
+
+
+def cache_ttl(end_date):
+    """Ranges that are still open (end on an unsettled day) expire quickly."""
+    try:
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        closed = end <= last_closed_day()
+    except (TypeError, ValueError):
+        closed = False
+    return PAST_REPORT_CACHE_TTL if closed else REPORT_CACHE_TTL
+
+
+def fetchTransactions(start_date, end_date, filter_by):
     apiURL = f"https://tryverdi.com/api/transaction_data?user_id={filter_by}&start_date={start_date}&end_date={end_date}"
     headers = {"Authorization": f"Bearer {VERDI_API_KEY}"}
     response = requests.get(url=apiURL, headers=headers)
@@ -20,14 +155,349 @@ def getData(start_date, end_date, filter_by):
     return response.json()
 
 
-def formatAreas(data):
+def getData(start_date, end_date, filter_by, refresh=False):
+    # Today's unfiltered data is maintained incrementally by the open window
+    if is_today(start_date, end_date) and filter_by == "all":
+        today_window.sync(force=refresh)
+        return today_window.order_list()
+
+    key = ("data", start_date, end_date, filter_by)
+    if not refresh:
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+
+    if filter_by == "all" and SNAPSHOT_DIR:
+        data = normalize_orders(getSnapshotData(start_date, end_date))
+    else:
+        data = normalize_orders(fetchTransactions(start_date, end_date, filter_by))
+    cache_set(key, data, cache_ttl(end_date))
+    return data
+
+
+def is_today(start_date, end_date):
+    today = date.today().isoformat()
+    return start_date == today and end_date == today
+
+
+def flatten_order(order, prefix=""):
+    """Flatten nested dicts into dotted column names (e.g. "pickup_task.address")."""
+    flat = {}
+    for key, value in order.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten_order(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def orders_to_table(orders, days, stored_days):
+    """Build a columnar table from orders; days gives each order's snapshot day.
+
+    stored_days lists every day the table covers, including days without orders.
+
+    String columns are dictionary-encoded when values repeat; any other column
+    is stored as JSON text. Keys missing from an order are recorded in
+    "_absent" so the original dicts round-trip exactly.
+    """
+    rows = [flatten_order(order) for order in orders]
+    names = list(dict.fromkeys(name for row in rows for name in row))
+
+    columns = {"_day": pa.array(days, pa.string())}
+    json_columns = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if all(v is None or isinstance(v, str) for v in values):
+            column = pa.array(values, pa.string())
+            if len(set(values)) * 2 <= len(values):
+                column = column.dictionary_encode()
+        else:
+            column = pa.array(
+                [None if v is None else json.dumps(v) for v in values], pa.string()
+            )
+            json_columns.append(name)
+        columns[name] = column
+
+    absent = [[name for name in names if name not in row] for row in rows]
+    columns["_absent"] = pa.array(
+        [json.dumps(a) if a else None for a in absent], pa.string()
+    )
+
+    table = pa.table(columns)
+    return table.replace_schema_metadata(
+        {
+            "json_columns": json.dumps(json_columns),
+            "days": json.dumps(sorted(stored_days)),
+        }
+    )
+
+
+def table_to_orders(table):
+    json_columns = set(json.loads(table.schema.metadata[b"json_columns"]))
+    names = [n for n in table.column_names if n not in ("_day", "_absent")]
+    columns = {name: table.column(name).to_pylist() for name in names}
+    absent = table.column("_absent").to_pylist()
+
+    orders = []
+    for i in range(table.num_rows):
+        skip = set(json.loads(absent[i])) if absent[i] else ()
+        order = {}
+        for name in names:
+            if name in skip:
+                continue
+            value = columns[name][i]
+            if value is not None and name in json_columns:
+                value = json.loads(value)
+
+            *parents, leaf = name.split(".")
+            target = order
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        orders.append(order)
+    return orders
+
+
+def snapshot_path(day):
+    return os.path.join(SNAPSHOT_DIR, "days", f"{day.isoformat()}.arrow")
+
+
+def month_snapshot_path(month):
+    return os.path.join(SNAPSHOT_DIR, "months", f"{month}.arrow")
+
+
+def write_snapshot_table(table, path, compression=None):
+    # Write to a temp file and rename so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_table(path):
+    # Memory-mapped, so workers reading the same file share its page cache
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def snapshot_days(table):
+    return json.loads(table.schema.metadata[b"days"])
+
+
+def read_month_snapshot(month):
+    """Decode a month file once into {day: orders}, or None if there is none."""
+    try:
+        table = read_snapshot_table(month_snapshot_path(month))
+    except FileNotFoundError:
+        return None
+
+    by_day = {day: [] for day in snapshot_days(table)}
+    for day, order in zip(table.column("_day").to_pylist(), table_to_orders(table)):
+        by_day[day].append(order)
+    return by_day
+
+
+def load_snapshot(day, months=None):
+    """Return the stored orders for a day, or None if it was never snapshotted.
+
+    months caches decoded month files across calls (see read_month_snapshot).
+    """
+    try:
+        return table_to_orders(read_snapshot_table(snapshot_path(day)))
+    except FileNotFoundError:
+        pass  # never stored, or compacted into the month file meanwhile
+
+    months = {} if months is None else months
+    month = day.strftime("%Y-%m")
+    if month not in months:
+        months[month] = read_month_snapshot(month)
+    if months[month] is not None:
+        return months[month].get(day.isoformat())
+
+    return None
+
+
+def save_snapshot(day, orders):
+    day_str = day.isoformat()
+    table = orders_to_table(orders, [day_str] * len(orders), [day_str])
+    write_snapshot_table(table, snapshot_path(day))
+
+
+def snapshot_expired(day, today=None):
+    """Days older than SNAPSHOT_RETENTION_DAYS are deleted and never stored again."""
+    if not SNAPSHOT_RETENTION_DAYS:
+        return False
+    return ((today or date.today()) - day).days > SNAPSHOT_RETENTION_DAYS
+
+
+def snapshot_day_of(order):
+    created = parse_dt(order.get("created_at"))
+    return created.date() if created else None
+
+
+def fetch_and_snapshot(first_day, last_day):
+    """Fetch a run of closed days from upstream and store one snapshot per day.
+
+    Orders without a created day inside the range belong to no snapshot, so
+    they are dropped rather than stored (and later counted) under another day.
+    """
+    data = fetchTransactions(first_day.isoformat(), last_day.isoformat(), "all")
+
+    by_day = defaultdict(list)
+    for order in data:
+        day = snapshot_day_of(order)
+        if day and first_day <= day <= last_day:
+            by_day[day].append(order)
+
+    day = first_day
+    while day <= last_day:
+        save_snapshot(day, by_day.get(day, []))
+        day += timedelta(days=1)
+
+    return [order for orders in by_day.values() for order in orders]
+
+
+def getSnapshotData(start_date, end_date):
+    """Serve closed days from the snapshot store and fetch only what is missing.
+
+    Days within SNAPSHOT_SETTLE_DAYS of today can still change, so they are
+    always fetched live and never stored. Days past SNAPSHOT_RETENTION_DAYS
+    are fetched live too, so retention isn't undone by the next report.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    last_closed = last_closed_day()
+
+    chunks = []
+    missing = []
+    months = {}  # each month file is decoded at most once per call
+
+    day = start
+    while day <= min(end, last_closed) and snapshot_expired(day):
+        day += timedelta(days=1)
+    if day > start:
+        last_expired = day - timedelta(days=1)
+        chunks.append(fetchTransactions(start_date, last_expired.isoformat(), "all"))
+
+    def fetch_missing():
+        if missing:
+            chunks.append(fetch_and_snapshot(missing[0], missing[-1]))
+            missing.clear()
+
+    while day <= min(end, last_closed):
+        orders = load_snapshot(day, months)
+        if orders is None:
+            missing.append(day)
+        else:
+            fetch_missing()
+            chunks.append(orders)
+        day += timedelta(days=1)
+    fetch_missing()
+
+    if end > last_closed:
+        open_start = max(start, last_closed + timedelta(days=1))
+        chunks.append(fetchTransactions(open_start.isoformat(), end_date, "all"))
+
+    return [order for chunk in chunks for order in chunk]
+
+
+def compact_snapshots(today=None):
+    """Merge old day files into compressed month files and apply retention.
+
+    Day files older than SNAPSHOT_COMPACT_AFTER_DAYS are folded into their
+    month file. With SNAPSHOT_RETENTION_DAYS set, older day files are deleted,
+    as are month files whose last stored day has expired.
+    """
+    today = today or date.today()
+    days_dir = os.path.join(SNAPSHOT_DIR, "days")
+    months_dir = os.path.join(SNAPSHOT_DIR, "months")
+
+    to_compact = defaultdict(list)
+    for filename in sorted(os.listdir(days_dir)) if os.path.isdir(days_dir) else []:
+        if not filename.endswith(".arrow"):
+            continue
+        day = datetime.strptime(filename[: -len(".arrow")], "%Y-%m-%d").date()
+        if snapshot_expired(day, today):
+            os.remove(os.path.join(days_dir, filename))
+        elif (today - day).days > SNAPSHOT_COMPACT_AFTER_DAYS:
+            to_compact[day.strftime("%Y-%m")].append(day)
+
+    for month, days in to_compact.items():
+        path = month_snapshot_path(month)
+        merged = read_month_snapshot(month) or {}
+        for day in days:
+            merged[day.isoformat()] = load_snapshot(day)
+
+        orders = [order for day in sorted(merged) for order in merged[day]]
+        order_days = [day for day in sorted(merged) for _ in merged[day]]
+        table = orders_to_table(orders, order_days, list(merged))
+        write_snapshot_table(table, path, SNAPSHOT_COMPRESSION)
+        for day in days:
+            os.remove(snapshot_path(day))
+
+    for filename in os.listdir(months_dir) if os.path.isdir(months_dir) else []:
+        if not filename.endswith(".arrow"):
+            continue
+        path = os.path.join(months_dir, filename)
+        days = snapshot_days(read_snapshot_table(path))
+        if not days or snapshot_expired(date.fromisoformat(days[-1]), today):
+            os.remove(path)
+
+
+def report_cache_key(endpoint, args):
+    # Missing filter_by/status mean "all", so both spellings share an entry
+    params = {"filter_by": ("all",), "status": ("all",)}
+    for name in args:
+        params[name] = tuple(sorted(args.getlist(name)))
+    return ("report", endpoint, tuple(sorted(params.items())))
+
+
+def cached_report(view):
+    """Serve a report route from the cache, storing successful responses.
+
+    Requests sent with "Cache-Control: no-cache" recompute and refresh the entry.
+    """
+
+    @wraps(view)
+    def wrapper():
+        key = report_cache_key(request.endpoint, request.args)
+        body = None
+        if request.headers.get("Cache-Control") != "no-cache":
+            body = cache_get(key)
+
+        if body is None:
+            response = view()
+            if isinstance(response, tuple) or response.status_code != 200:
+                return response
+            body = response.get_data()
+            start_date = request.args.get("start_date")
+            end_date = request.args.get("end_date")
+            ttl = cache_ttl(end_date)
+            if is_today(start_date, end_date):
+                # Today's window moves every TODAY_SYNC_INTERVAL
+                ttl = min(ttl, TODAY_SYNC_INTERVAL)
+            cache_set(key, body, ttl)
+
+        return app.response_class(body, mimetype="application/json")
+
+    return wrapper
+
+
+@lru_cache(maxsize=None)
+def load_areas():
     # Load JSON data from file
     with open("areas.json", "r", encoding="utf-8") as file:
-        areas_data = json.load(file)
+        return json.load(file)
+
 
+@lru_cache(maxsize=None)
+def load_area_aliases():
     # Build a mapping of each alias → (canonical name, lat, lon)
     area_alias_map = {}
-    for item in areas_data:
+    for item in load_areas():
         if "neighborhoodenglish" in item:
             aliases = [
                 alias.strip() for alias in item["neighborhoodenglish"].split(",")
@@ -39,100 +509,680 @@ def formatAreas(data):
                 for alias in aliases:
                     area_alias_map[alias.lower()] = (canonical, lat, lon)
 
-    # Area extraction helper
-    def extract_area_with_coords(address):
-        if not address:
-            return "Unknown", None, None
-        address_lower = address.lower()
-        for alias, (canonical, lat, lon) in area_alias_map.items():
-            if alias in address_lower:
-                return canonical, lat, lon
+    return area_alias_map
+
+
+# Pickup addresses repeat heavily (the same merchants), so memoize the scan
+@lru_cache(maxsize=8192)
+def extract_area_with_coords(address):
+    if not address:
         return "Unknown", None, None
+    address_lower = address.lower()
+    for alias, (canonical, lat, lon) in load_area_aliases().items():
+        if alias in address_lower:
+            return canonical, lat, lon
+    return "Unknown", None, None
+
+
+class CentroidGrid:
+    """Uniform lat/lon grid over area centroids for nearest-area lookups.
+
+    Cells are searched in rings around the query point, stopping once no
+    unsearched cell can hold anything closer than the best match so far.
+    Once the rings span more cells than are populated (far from every
+    centroid, or near the poles where cells get thin), a linear scan of the
+    centroids is cheaper and the ring search stops.
+    """
+
+    def __init__(self, points, cell_size):
+        self.cell_size = cell_size
+        self.points = list(points)
+        self.cells = defaultdict(list)
+        for lat, lon, area in self.points:
+            self.cells[self.cell(lat, lon)].append((lat, lon, area))
+        self.max_ring = math.isqrt(len(self.cells)) // 2 + 1
+
+    def cell(self, lat, lon):
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def nearest(self, lat, lon, max_km):
+        lon_scale = math.cos(math.radians(lat))
+        # Smallest side of a cell, so ring r is at least (r - 1) cells away
+        cell_km = 111.32 * self.cell_size * lon_scale
+        row, col = self.cell(lat, lon)
+
+        best, best_km = None, max_km
+
+        def visit(points):
+            nonlocal best, best_km
+            for c_lat, c_lon, area in points:
+                km = 111.32 * math.hypot(c_lat - lat, (c_lon - lon) * lon_scale)
+                if km <= best_km:
+                    best, best_km = area, km
+
+        ring = 0
+        while (ring - 1) * cell_km <= best_km:
+            if ring > self.max_ring:
+                visit(self.points)
+                break
+            for i in range(row - ring, row + ring + 1):
+                for j in range(col - ring, col + ring + 1):
+                    if max(abs(i - row), abs(j - col)) == ring:
+                        visit(self.cells.get((i, j), ()))
+            ring += 1
+        return best
+
+
+@lru_cache(maxsize=None)
+def load_area_grid():
+    points = []
+    for item in load_areas():
+        lat, lon = item.get("centroid_y"), item.get("centroid_x")
+        if "neighborhoodenglish" in item and lat is not None and lon is not None:
+            canonical = item["neighborhoodenglish"].split(",")[0].strip()
+            points.append((lat, lon, (canonical, lat, lon)))
+    return CentroidGrid(points, AREA_GRID_CELL_DEGREES)
+
+
+def alias_tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def single_deletions(word):
+    return [word] + [word[:i] + word[i + 1 :] for i in range(len(word))]
+
+
+def within_one_edit(a, b):
+    """Levenshtein distance <= 1, without building the full matrix."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1 :] == b[i + 1 :]
+    return a[i:] == b[i + 1 :]
+
+
+@lru_cache(maxsize=None)
+def load_fuzzy_alias_index():
+    # Deletion index: every alias under itself and each single-char deletion,
+    # so a lookup only probes the deletions of the query phrase
+    index = defaultdict(list)
+    for alias, area in load_area_aliases().items():
+        normalized = " ".join(alias_tokens(alias))
+        if len(normalized) < AREA_FUZZY_MIN_LENGTH:
+            continue
+        for variant in single_deletions(normalized):
+            if (normalized, area) not in index[variant]:
+                index[variant].append((normalized, area))
+    return index
+
+
+@lru_cache(maxsize=8192)
+def fuzzy_area_match(address):
+    """Match address phrases (up to 3 tokens) to aliases within one edit.
+
+    An exact alias wins; otherwise a phrase within one edit of aliases from
+    different areas (e.g. salmiya/salhiya) is ambiguous and matches nothing.
+    """
+    if not address:
+        return None
+    index = load_fuzzy_alias_index()
+    tokens = alias_tokens(address)
+    for n in (3, 2, 1):  # prefer the longest matching phrase
+        for i in range(len(tokens) - n + 1):
+            phrase = " ".join(tokens[i : i + n])
+            if len(phrase) < AREA_FUZZY_MIN_LENGTH:
+                continue
+            candidates = {}
+            for variant in single_deletions(phrase):
+                for alias, area in index.get(variant, ()):
+                    if within_one_edit(phrase, alias):
+                        candidates[alias] = area
+            if phrase in candidates:
+                return candidates[phrase]
+            areas = set(candidates.values())
+            if len(areas) > 1:
+                return None
+            if areas:
+                return areas.pop()
+    return None
+
+
+def resolve_area(address, lat=None, lon=None):
+    """Alias substring match, then nearest centroid, then fuzzy alias match."""
+    area = extract_area_with_coords(address)
+    if area[0] != "Unknown":
+        return area
+    if lat is not None and lon is not None:
+        nearest = load_area_grid().nearest(lat, lon, AREA_MAX_DISTANCE_KM)
+        if nearest:
+            return nearest
+    return fuzzy_area_match(address) or area
+
+
+def pickup_coordinates(pickup):
+    for lat_key, lon_key in PICKUP_COORDINATE_KEYS:
+        try:
+            lat, lon = float(pickup[lat_key]), float(pickup[lon_key])
+        except (KeyError, TypeError, ValueError):
+            continue
+        # float() accepts "nan"/"inf"; those and out-of-range values are unusable
+        if math.isfinite(lat) and math.isfinite(lon):
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                return lat, lon
+    return None, None
 
-    # Loop through data and add "area", "latitude", "longitude"
-    for obj in data:
-        pickup_address = obj.get("pickup_task", {}).get("address", "")
-        area, lat, lon = extract_area_with_coords(pickup_address)
-        obj["area"] = area
-        obj["latitude"] = lat
-        obj["longitude"] = lon
 
-    return data
+STAGE_METRICS = (
+    "DeliveryTimes",
+    "AssignTimes",
+    "PickupWaits",
+    "TravelTimes",
+    "DropoffWaits",
+)
 
+EPOCH = datetime(1970, 1, 1)
 
-def reports_area(data):
-    # Helper to parse datetime
-    def parse_dt(ts):
-        return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S") if ts else None
-
-    # Aggregate per area
-    areas = defaultdict(
-        lambda: {
-            "Orders": 0,
-            "Revenue": 0,
-            "DeliveryTimes": [],
-            "AssignTimes": [],
-            "PickupWaits": [],
-            "TravelTimes": [],
-            "DropoffWaits": [],
-        }
+
+def parse_dt(ts):
+    try:
+        return datetime.strptime(ts, TIMESTAMP_FORMAT) if ts else None
+    except (TypeError, ValueError):
+        return None
+
+
+class Categories:
+    """Interned values of one categorical field, addressed by integer code."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+        self.lock = threading.Lock()
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            with self.lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self.codes[value] = code
+        return code
+
+    def matching(self, predicate):
+        """Codes of every value the predicate accepts, for filtering records."""
+        return {code for code, value in enumerate(self.values) if predicate(value)}
+
+
+# Client/driver value of an order that lacks the key: reports show it as
+# "Unknown" in their tables but as null in transaction rows
+ABSENT = object()
+
+
+def table_name(value):
+    return "Unknown" if value is ABSENT else value
+
+
+def raw_value(value):
+    return None if value is ABSENT else value
+
+
+CLIENTS = Categories()
+DRIVERS = Categories()
+GROUPS = Categories()
+STATUSES = Categories()
+AREAS = Categories()  # values are (area, lat, lon) tuples
+
+
+class OrderRecord:
+    """Normalized order: categorical fields are codes, times are parsed once."""
+
+    __slots__ = (
+        "reference",
+        "client",
+        "driver",
+        "group",
+        "status",
+        "area",
+        "fare",
+        "created",
+        "created_text",  # raw created_at, kept only when it isn't canonical
+        "stages",
+        "pickup_address",
+        "delivery_address",
     )
 
-    for order in data:
-        area = order.get("area", "Unknown")
-        try:
-            revenue = round(abs(float(order.get("amount", 0))), 2)
-        except:
-            revenue = 0
-
-        created = parse_dt(order.get("created_at"))
-        pickup = order.get("pickup_task", {})
-        delivery = order.get("delivery_task", {})
-
-        pickup_assigned = parse_dt(pickup.get("assigned_at"))
-        pickup_arrived = parse_dt(pickup.get("arrived_at"))
-        pickup_success = parse_dt(pickup.get("successful_at"))
-
-        delivery_started = parse_dt(delivery.get("started_at"))
-        delivery_arrived = parse_dt(delivery.get("arrived_at"))
-        delivery_success = parse_dt(delivery.get("successful_at"))
-
-        # Aggregate metrics
-        if created and delivery_success:
-            areas[area]["DeliveryTimes"].append(
-                (delivery_success - created).total_seconds() / 60
-            )
-        if created and pickup_assigned:
-            areas[area]["AssignTimes"].append(
-                (pickup_assigned - created).total_seconds() / 60
-            )
-        if pickup_success and pickup_arrived:
-            areas[area]["PickupWaits"].append(
-                (pickup_success - pickup_arrived).total_seconds() / 60
-            )
-        if delivery_arrived and delivery_started:
-            areas[area]["TravelTimes"].append(
-                (delivery_arrived - delivery_started).total_seconds() / 60
-            )
-        if delivery_success and delivery_arrived:
-            areas[area]["DropoffWaits"].append(
-                (delivery_success - delivery_arrived).total_seconds() / 60
+    @property
+    def amount(self):
+        return round(self.fare, 2)
+
+    @property
+    def created_at(self):
+        if self.created is None or self.created_text is not None:
+            return self.created_text
+        return (EPOCH + timedelta(seconds=self.created)).strftime(TIMESTAMP_FORMAT)
+
+
+def normalize_order(order):
+    pickup = order.get("pickup_task", {})
+    delivery = order.get("delivery_task", {})
+
+    try:
+        fare = abs(float(order.get("amount", 0)))
+    except (TypeError, ValueError):
+        fare = 0
+
+    created_text = order.get("created_at")
+    created = parse_dt(created_text)
+    pickup_assigned = parse_dt(pickup.get("assigned_at"))
+    pickup_arrived = parse_dt(pickup.get("arrived_at"))
+    pickup_success = parse_dt(pickup.get("successful_at"))
+    delivery_started = parse_dt(delivery.get("started_at"))
+    delivery_arrived = parse_dt(delivery.get("arrived_at"))
+    delivery_success = parse_dt(delivery.get("successful_at"))
+
+    def minutes(start, end):
+        return (end - start).total_seconds() / 60 if start and end else None
+
+    driver_name = pickup.get("driver_name", ABSENT)
+    pickup_address = pickup.get("address")
+
+    record = OrderRecord()
+    record.reference = order.get("reference")
+    record.client = CLIENTS.code(order.get("user_name", ABSENT))
+    record.driver = DRIVERS.code(driver_name)
+    # Orders without a driver name belong to no group
+    record.group = GROUPS.code(
+        driver_name.split()[-1].upper()
+        if isinstance(driver_name, str) and driver_name.split()
+        else None
+    )
+    record.status = STATUSES.code(order.get("status"))
+    record.area = AREAS.code(resolve_area(pickup_address, *pickup_coordinates(pickup)))
+    record.fare = fare
+    record.created = int((created - EPOCH).total_seconds()) if created else None
+    record.created_text = (
+        None
+        if created and created.strftime(TIMESTAMP_FORMAT) == created_text
+        else created_text
+    )
+    record.stages = (
+        minutes(created, delivery_success),
+        minutes(created, pickup_assigned),
+        minutes(pickup_arrived, pickup_success),
+        minutes(delivery_started, delivery_arrived),
+        minutes(delivery_arrived, delivery_success),
+    )
+    if isinstance(pickup_address, str):
+        pickup_address = sys.intern(pickup_address)
+    record.pickup_address = pickup_address
+    record.delivery_address = delivery.get("address")
+    return record
+
+
+def normalize_orders(raw):
+    """Convert raw API orders to records, dropping each raw dict once converted."""
+    records = []
+    for i, order in enumerate(raw):
+        records.append(normalize_order(order))
+        raw[i] = None
+    return records
+
+
+AMOUNT_UNITS = 100  # "Amount" sums rounded amounts in cents
+FARE_UNITS = 1_000_000  # "Fare" sums raw fares in millionths
+
+
+def new_stats():
+    stats = {"Orders": 0, "Amount": 0, "Fare": 0}
+    for metric in STAGE_METRICS:
+        stats[metric] = [0, 0]  # [sum of minutes, count]
+    return stats
+
+
+def new_aggregates():
+    return {
+        "totals": new_stats(),
+        "client": defaultdict(new_stats),
+        "driver": defaultdict(new_stats),
+        "group": defaultdict(new_stats),
+        "area": defaultdict(new_stats),
+        "created": {},
+    }
+
+
+def add_contribution(aggs, key, record, sign=1):
+    """Add (sign=1) or remove (sign=-1) one order's contribution in place."""
+    area, lat, lon = AREAS.values[record.area]
+    targets = [
+        (None, None, aggs["totals"]),
+        ("client", table_name(CLIENTS.values[record.client]), None),
+        ("driver", table_name(DRIVERS.values[record.driver]), None),
+        ("area", area, None),
+    ]
+    group = GROUPS.values[record.group]
+    if group is not None:
+        targets.append(("group", group, None))
+
+    # Exact integer units, so sums don't depend on the order they were added in
+    amount = round(record.amount * AMOUNT_UNITS)
+    fare = round(record.fare * FARE_UNITS)
+    for dimension, name, stats in targets:
+        if stats is None:
+            stats = aggs[dimension][name]
+        stats["Orders"] += sign
+        stats["Amount"] += sign * amount
+        stats["Fare"] += sign * fare
+        for metric, value in zip(STAGE_METRICS, record.stages):
+            if value is not None:
+                stats[metric][0] += sign * value
+                stats[metric][1] += sign
+        if dimension == "area" and "latitude" not in stats:
+            stats["latitude"] = lat
+            stats["longitude"] = lon
+        if dimension and stats["Orders"] == 0:
+            del aggs[dimension][name]
+
+    if sign > 0 and record.created is not None:
+        aggs["created"][key] = record.created
+    elif sign < 0:
+        aggs["created"].pop(key, None)
+
+
+def aggregate_orders(records):
+    aggs = new_aggregates()
+    for i, record in enumerate(records):
+        add_contribution(aggs, i, record)
+    return aggs
+
+
+def stats_amount(stats):
+    return stats["Amount"] / AMOUNT_UNITS
+
+
+def stats_fare(stats):
+    return stats["Fare"] / FARE_UNITS
+
+
+def created_epochs(aggs):
+    created = aggs["created"]
+    if isinstance(created, dict):  # keyed by order, so orders can be removed
+        return np.fromiter(created.values(), dtype=np.int64)
+    return created  # merged rollups keep a plain array
+
+
+def average(metric, default=None):
+    total, count = metric
+    return round(total / count, 2) if count else default
+
+
+class OpenWindow:
+    """Today's orders and their running aggregates, kept current by delta fetches.
+
+    Orders are upserted by reference: unchanged orders are skipped, changed
+    ones have their old record subtracted before the new one is added.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()  # guards the dataset and aggregates
+        self.sync_lock = threading.Lock()  # one upstream sync at a time
+        self.reset(None)
+
+    def reset(self, day):
+        self.day = day
+        self.day_number = (day - EPOCH.date()).days if day else None  # epoch days
+        self.orders = {}
+        self.fingerprints = {}
+        self.aggregates = new_aggregates()
+        self.watermark = None  # newest created_at seen, in epoch seconds
+        self.last_sync = None
+        self.last_full_sync = None
+
+    def upsert(self, order):
+        key = order.get("reference") or json.dumps(order, sort_keys=True)
+        fingerprint = hash(json.dumps(order, sort_keys=True, default=str))
+        if self.fingerprints.get(key) == fingerprint:
+            return key
+
+        record = normalize_order(order)
+        if record.created is not None and record.created // 86400 != self.day_number:
+            # Created on another day (e.g. a delta slice reaching before midnight)
+            if key in self.orders:
+                self.remove(key)
+            return key
+
+        if key in self.orders:
+            add_contribution(self.aggregates, key, self.orders[key], sign=-1)
+        add_contribution(self.aggregates, key, record)
+
+        self.orders[key] = record
+        self.fingerprints[key] = fingerprint
+        if record.created is not None:
+            self.watermark = max(self.watermark or 0, record.created)
+        return key
+
+    def remove(self, key):
+        add_contribution(self.aggregates, key, self.orders.pop(key), sign=-1)
+        del self.fingerprints[key]
+
+    def sync(self, force=False):
+        with self.sync_lock:
+            today = date.today()
+            now = monotonic()
+            if self.day != today:
+                with self.lock:
+                    self.reset(today)
+            elif (
+                not force
+                and self.last_sync is not None
+                and now - self.last_sync < TODAY_SYNC_INTERVAL
+            ):
+                return
+
+            # last_sync/last_full_sync are only set once a sync completes, so
+            # a failed one is retried by the next call
+            day_str = today.isoformat()
+            full = (
+                self.watermark is None
+                or self.last_full_sync is None
+                or now - self.last_full_sync >= TODAY_FULL_SYNC_INTERVAL
             )
+            if not full:
+                # Narrow slice since the watermark; the overlap re-reads orders
+                # that were still being written at the last sync
+                since = max(
+                    EPOCH + timedelta(seconds=self.watermark - TODAY_DELTA_OVERLAP),
+                    datetime.combine(today, time(0, 0)),
+                )
+                try:
+                    data = fetchTransactions(
+                        since.strftime(TIMESTAMP_FORMAT), day_str, "all"
+                    )
+                except requests.RequestException as e:
+                    print("Delta fetch failed, falling back to full sync:", e)
+                    full = True
+            if full:
+                data = fetchTransactions(day_str, day_str, "all")
+
+            self.apply(data, full, now)
+
+    def load(self, data, fetched_at):
+        """Full sync from today's orders fetched elsewhere at fetched_at.
+
+        Skipped when the window's own last sync is newer than that data.
+        """
+        with self.sync_lock:
+            if self.day != date.today():
+                with self.lock:
+                    self.reset(date.today())
+            elif self.last_sync is not None and self.last_sync >= fetched_at:
+                return
+            self.apply(data, True, fetched_at)
+
+    def apply(self, data, full, synced_at):
+        with self.lock:
+            seen = set()
+            for i, order in enumerate(data):
+                seen.add(self.upsert(order))
+                data[i] = None  # only the record is kept
+            if full:
+                # Orders that disappeared upstream leave the window
+                for key in [k for k in self.orders if k not in seen]:
+                    self.remove(key)
+                self.last_full_sync = synced_at
+
+            self.last_sync = synced_at
+
+    def order_list(self):
+        with self.lock:
+            return list(self.orders.values())
+
+    def report(self, builder, *args):
+        """Build a report straight from the running aggregates."""
+        self.sync()
+        with self.lock:
+            return builder(self.aggregates, *args)
+
+
+today_window = OpenWindow()
+
+
+def split_charts(labels, counts, chart_size=None):
+    """Group bucket counts into named charts.
+
+    With no chart_size, anything over 10 buckets is split into two halves.
+    """
+    if not labels:
+        return {}
+
+    if chart_size:
+        chunks = [
+            range(i, min(i + chart_size, len(labels)))
+            for i in range(0, len(labels), chart_size)
+        ]
+    elif len(labels) > 10:
+        mid = len(labels) // 2
+        chunks = [range(0, mid), range(mid, len(labels))]
+    else:
+        chunks = [range(0, len(labels))]
 
-        # Update counts
-        areas[area]["Orders"] += 1
-        areas[area]["Revenue"] += revenue
+    return {
+        f"{labels[chunk[0]]} to {labels[chunk[-1]]}": {
+            labels[i]: counts[i] for i in chunk
+        }
+        for chunk in chunks
+    }
+
+
+def time_charts(
+    epochs,
+    granularity="hour",
+    start_time=time(0, 0),
+    end_time=time(23, 59),
+    start_date=None,
+    end_date=None,
+    chart_size=None,
+):
+    """Bucket epoch seconds into chart data for the requested granularity.
+
+    Minute granularities only keep slots inside the daily start_time/end_time
+    window; "date" covers start_date..end_date (or the data's own range).
+    """
+    days = epochs // 86400
+    seconds_of_day = epochs % 86400
+    weekdays = (days + 3) % 7  # 1970-01-01 was a Thursday
+
+    if granularity == "weekday":
+        counts = np.bincount(weekdays, minlength=7).tolist()
+        return split_charts(WEEKDAYS, counts, chart_size)
+
+    if granularity == "heatmap":
+        cells = weekdays * 24 + seconds_of_day // 3600
+        grid = np.bincount(cells, minlength=7 * 24).reshape(7, 24).tolist()
+        hours = [f"{h}-{(h + 1) % 24}" for h in range(24)]
+        return {WEEKDAYS[d]: dict(zip(hours, grid[d])) for d in range(7)}
+
+    if granularity == "date":
+        if start_date and end_date:
+            first_day = (start_date - date(1970, 1, 1)).days
+            num_days = (end_date - start_date).days + 1
+        elif len(days):
+            first_day = int(days.min())
+            num_days = int(days.max()) - first_day + 1
+        else:
+            return {}
+        if num_days <= 0:  # reversed range: no dates to chart
+            return {}
+        offsets = days - first_day
+        offsets = offsets[(offsets >= 0) & (offsets < num_days)]
+        counts = np.bincount(offsets, minlength=num_days).tolist()
+        labels = [
+            (date(1970, 1, 1) + timedelta(days=first_day + i)).isoformat()
+            for i in range(num_days)
+        ]
+        return split_charts(labels, counts, chart_size)
+
+    # Minute-based slots of the day
+    width = CHART_GRANULARITIES[granularity]
+    slots_per_day = 1440 // width
+    counts = np.bincount(seconds_of_day // (width * 60), minlength=slots_per_day)
+
+    start_minute = start_time.hour * 60 + start_time.minute
+    end_minute = end_time.hour * 60 + end_time.minute
+    first_slot = start_minute // width
+    last_slot = (end_minute - 1) // width
+
+    # Handle overnight time ranges (e.g., 22:00 to 05:00)
+    if end_minute < start_minute:
+        slots = list(range(0, last_slot + 1)) + list(range(first_slot, slots_per_day))
+    elif end_minute > start_minute:
+        slots = list(range(first_slot, last_slot + 1))
+    else:
+        slots = []
+
+    def slot_label(slot):
+        if width == 60:
+            return f"{slot}-{(slot + 1) % 24}"
+        start = slot * width
+        end = (start + width) % 1440
+        return f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
+
+    return split_charts(
+        [slot_label(s) for s in slots], [int(counts[s]) for s in slots], chart_size
+    )
 
-    # Helper for average
-    def avg(lst):
-        return round(sum(lst) / len(lst), 2) if lst else 0
+
+def chart_options():
+    """Read and validate the granularity/chart_size query parameters."""
+    granularity = request.args.get("granularity", "hour")
+    if granularity not in CHART_GRANULARITIES:
+        raise ValueError(
+            f"granularity must be one of {', '.join(CHART_GRANULARITIES)}"
+        )
+
+    chart_size = request.args.get("chart_size")
+    if chart_size is not None:
+        if not chart_size.isdigit() or int(chart_size) < 1:
+            raise ValueError("chart_size must be a positive integer")
+        chart_size = int(chart_size)
+
+    return {"granularity": granularity, "chart_size": chart_size}
+
+
+def reports_area(aggs, chart_opts=None):
+    areas = aggs["area"]
 
     # Build statcards
     total_orders = sum(a["Orders"] for a in areas.values())
-    total_revenue = round(sum(a["Revenue"] for a in areas.values()), 2)
+    total_revenue = round(sum(a["Amount"] for a in areas.values()) / AMOUNT_UNITS, 2)
     avg_fare = round(total_revenue / total_orders, 2) if total_orders else 0
     avg_delivery_time = (
-        round(sum(sum(a["DeliveryTimes"]) for a in areas.values()) / total_orders, 2)
+        round(sum(a["DeliveryTimes"][0] for a in areas.values()) / total_orders, 2)
         if total_orders
         else 0
     )
@@ -150,23 +1200,9 @@ def reports_area(data):
             {
                 "area": area,
                 "orders": a["Orders"],
-                "revenue": a["Revenue"],
-                "latitude": next(
-                    (
-                        order.get("latitude")
-                        for order in data
-                        if order.get("area") == area
-                    ),
-                    None,
-                ),
-                "longitude": next(
-                    (
-                        order.get("longitude")
-                        for order in data
-                        if order.get("area") == area
-                    ),
-                    None,
-                ),
+                "revenue": stats_amount(a),
+                "latitude": a["latitude"],
+                "longitude": a["longitude"],
             }
             for area, a in areas.items()
         ],
@@ -180,15 +1216,15 @@ def reports_area(data):
             {
                 "Area": area,
                 "Orders": a["Orders"],
-                "Total Revenue": a["Revenue"],
+                "Total Revenue": stats_amount(a),
                 "Average Fare": (
-                    round(a["Revenue"] / a["Orders"], 2) if a["Orders"] else 0
+                    round(stats_amount(a) / a["Orders"], 2) if a["Orders"] else 0
                 ),
-                "Average Delivery Time (min)": avg(a["DeliveryTimes"]),
-                "Avg Time to Assign (min)": avg(a["AssignTimes"]),
-                "Avg Pickup Waiting (min)": avg(a["PickupWaits"]),
-                "Avg Travel to Customer (min)": avg(a["TravelTimes"]),
-                "Avg Dropoff Waiting (min)": avg(a["DropoffWaits"]),
+                "Average Delivery Time (min)": average(a["DeliveryTimes"], 0),
+                "Avg Time to Assign (min)": average(a["AssignTimes"], 0),
+                "Avg Pickup Waiting (min)": average(a["PickupWaits"], 0),
+                "Avg Travel to Customer (min)": average(a["TravelTimes"], 0),
+                "Avg Dropoff Waiting (min)": average(a["DropoffWaits"], 0),
             }
             for area, a in areas.items()
         ],
@@ -196,53 +1232,22 @@ def reports_area(data):
         reverse=True,
     )
 
-    return {"statcards": statcards, "heatmap": heatmap, "table": table}
-
-
-def reports_3pl(data):
-    def count_orders(data):
-        return len(data)
-
-    def total_fare(data):
-        return round(sum(abs(float(order["amount"])) for order in data), 2)
-
-    def average_fare(data):
-        num_orders = count_orders(data)
-        return round(total_fare(data) / num_orders, 2) if num_orders > 0 else 0
-
-    def average_time_taken(data):
-        total_minutes = 0
-        count = 0
-        for order in data:
-            created_str = order.get("created_at")
-            successful_str = order.get("delivery_task", {}).get("successful_at")
-            if not created_str or not successful_str:
-                continue
-            try:
-                created = datetime.strptime(created_str, "%Y-%m-%d %H:%M:%S")
-                successful = datetime.strptime(successful_str, "%Y-%m-%d %H:%M:%S")
-                total_minutes += (successful - created).total_seconds() / 60
-                count += 1
-            except:
-                continue
-        return round(total_minutes / count, 2) if count > 0 else 0
+    charts = time_charts(created_epochs(aggs), **(chart_opts or {}))
 
-    def total_earnings(data):
-        return round(total_fare(data) * 0.85, 2)
+    return {
+        "statcards": statcards,
+        "heatmap": heatmap,
+        "charts": charts,
+        "table": table,
+    }
 
-    def total_revenue(data):
-        fare = total_fare(data)
-        return round(fare - (fare * 0.85), 2)
 
-    def charts_per_driver_group(data):
-        groups = defaultdict(list)
-        for order in data:
-            driver_name = order.get("pickup_task", {}).get("driver_name", "")
-            if not driver_name:
-                continue
-            group = driver_name.split()[-1].upper()
-            groups[group].append(order)
+def reports_3pl(aggs, chart_opts=None):
+    totals = aggs["totals"]
+    num_orders = totals["Orders"]
+    fare = round(stats_fare(totals), 2)
 
+    def charts_per_driver_group(groups):
         result = {
             "number_of_orders": {},
             "total_fare": {},
@@ -250,109 +1255,32 @@ def reports_3pl(data):
             "total_earnings": {},
         }
 
-        for group, orders in groups.items():
-            num_orders = len(orders)
-            fare = round(sum(abs(float(o["amount"])) for o in orders), 2)
-            avg_fare = round(fare / num_orders, 2) if num_orders > 0 else 0
-            earnings = round(fare * 0.85, 2)
+        for group, stats in groups.items():
+            group_orders = stats["Orders"]
+            group_fare = round(stats_fare(stats), 2)
+            avg_fare = round(group_fare / group_orders, 2) if group_orders > 0 else 0
+            earnings = round(group_fare * 0.85, 2)
 
-            result["number_of_orders"][group] = num_orders
-            result["total_fare"][group] = fare
+            result["number_of_orders"][group] = group_orders
+            result["total_fare"][group] = group_fare
             result["average_fare"][group] = avg_fare
             result["total_earnings"][group] = earnings
 
         return result
 
-    def table_data_rows(data):
-        drivers = defaultdict(
-            lambda: {
-                "Amount": 0,
-                "Orders": 0,
-                "DeliveryTimes": [],
-                "AssignTimes": [],
-                "PickupWaits": [],
-                "TravelTimes": [],
-                "DropoffWaits": [],
-            }
-        )
-
-        def parse_dt(ts):
-            return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S") if ts else None
-
-        for order in data:
-            driver = order.get("pickup_task", {}).get("driver_name", "Unknown")
-            amount_str = order.get("amount")
-
-            # Parse amount
-            try:
-                amount = round(abs(float(amount_str)), 2)
-            except:
-                amount = 0
-
-            # Parse timestamps
-            created = parse_dt(order.get("created_at"))
-            pickup = order.get("pickup_task", {})
-            delivery = order.get("delivery_task", {})
-
-            pickup_assigned = parse_dt(pickup.get("assigned_at"))
-            pickup_arrived = parse_dt(pickup.get("arrived_at"))
-            pickup_success = parse_dt(pickup.get("successful_at"))
-
-            delivery_started = parse_dt(delivery.get("started_at"))
-            delivery_arrived = parse_dt(delivery.get("arrived_at"))
-            delivery_success = parse_dt(delivery.get("successful_at"))
-
-            # Delivery time
-            if created and delivery_success:
-                drivers[driver]["DeliveryTimes"].append(
-                    (delivery_success - created).total_seconds() / 60
-                )
-
-            # Time to assign
-            if created and pickup_assigned:
-                drivers[driver]["AssignTimes"].append(
-                    (pickup_assigned - created).total_seconds() / 60
-                )
-
-            # Pickup waiting
-            if pickup_success and pickup_arrived:
-                drivers[driver]["PickupWaits"].append(
-                    (pickup_success - pickup_arrived).total_seconds() / 60
-                )
-
-            # Travel to customer
-            if delivery_arrived and delivery_started:
-                drivers[driver]["TravelTimes"].append(
-                    (delivery_arrived - delivery_started).total_seconds() / 60
-                )
-
-            # Dropoff waiting
-            if delivery_success and delivery_arrived:
-                drivers[driver]["DropoffWaits"].append(
-                    (delivery_success - delivery_arrived).total_seconds() / 60
-                )
-
-            # Update earnings
-            drivers[driver]["Amount"] += amount
-            drivers[driver]["Orders"] += 1
-
-        # Build final rows
+    def table_data_rows(drivers):
         rows = []
         for driver, stats in drivers.items():
-
-            def avg(lst):
-                return round(sum(lst) / len(lst), 2) if lst else None
-
             rows.append(
                 {
                     "Driver": driver,
                     "Orders": stats["Orders"],
-                    "Amount": round(stats["Amount"], 2),
-                    "Average Delivery Time (min)": avg(stats["DeliveryTimes"]),
-                    "Avg Time to Assign (min)": avg(stats["AssignTimes"]),
-                    "Avg Pickup Waiting (min)": avg(stats["PickupWaits"]),
-                    "Avg Travel to Customer (min)": avg(stats["TravelTimes"]),
-                    "Avg Dropoff Waiting (min)": avg(stats["DropoffWaits"]),
+                    "Amount": round(stats_amount(stats), 2),
+                    "Average Delivery Time (min)": average(stats["DeliveryTimes"]),
+                    "Avg Time to Assign (min)": average(stats["AssignTimes"]),
+                    "Avg Pickup Waiting (min)": average(stats["PickupWaits"]),
+                    "Avg Travel to Customer (min)": average(stats["TravelTimes"]),
+                    "Avg Dropoff Waiting (min)": average(stats["DropoffWaits"]),
                 }
             )
 
@@ -360,195 +1288,30 @@ def reports_3pl(data):
 
     # ---- Build the summary ----
     summary = {
-        "Number of Orders": count_orders(data),
-        "Total Fare": total_fare(data),
-        "Average Fare": average_fare(data),
-        "Average Time Taken (minutes)": average_time_taken(data),
-        "Total Earnings": total_earnings(data),
-        "Total Revenue": total_revenue(data),
-        "Charts": charts_per_driver_group(data),
-        "table_data": table_data_rows(data),
+        "Number of Orders": num_orders,
+        "Total Fare": fare,
+        "Average Fare": round(fare / num_orders, 2) if num_orders > 0 else 0,
+        "Average Time Taken (minutes)": average(totals["DeliveryTimes"], 0),
+        "Total Earnings": round(fare * 0.85, 2),
+        "Total Revenue": round(fare - (fare * 0.85), 2),
+        "Charts": charts_per_driver_group(aggs["group"]),
+        "Time Charts": time_charts(created_epochs(aggs), **(chart_opts or {})),
+        "table_data": table_data_rows(aggs["driver"]),
     }
 
     return summary
 
 
-def reports_client(data, start_dt, end_dt):
-    def count_orders(data):
-        return len(data)
-
-    def total_fare(data):
-        return round(sum(abs(float(order["amount"])) for order in data), 2)
-
-    def average_fare(data):
-        num_orders = count_orders(data)
-        return round(total_fare(data) / num_orders, 2) if num_orders > 0 else 0
-
-    def average_time_taken(data):
-        total_minutes = 0
-        count = 0
-        for order in data:
-            created_str = order.get("created_at")
-            successful_str = order.get("delivery_task", {}).get("successful_at")
-            if not created_str or not successful_str:
-                continue
-            try:
-                created = datetime.strptime(created_str, "%Y-%m-%d %H:%M:%S")
-                successful = datetime.strptime(successful_str, "%Y-%m-%d %H:%M:%S")
-                total_minutes += (successful - created).total_seconds() / 60
-                count += 1
-            except:
-                continue
-        return round(total_minutes / count, 2) if count > 0 else 0
-
-    def charts_per_time_slot(data, start_time, end_time):
-        # Build unique hourly buckets based on the time range (not date range)
-        buckets = []
-        seen_buckets = set()
-
-        # Create a dummy date to work with time ranges
-        dummy_date = datetime(2024, 1, 1)
-        current_time = datetime.combine(dummy_date.date(), start_time)
-        end_datetime = datetime.combine(dummy_date.date(), end_time)
+def reports_client(aggs, start_dt, end_dt, granularity="hour", chart_size=None):
+    totals = aggs["totals"]
+    num_orders = totals["Orders"]
+    fare = round(stats_fare(totals), 2)
 
-        # Handle overnight time ranges (e.g., 22:00 to 05:00)
-        if end_time < start_time:
-            end_datetime += timedelta(days=1)
-
-        while current_time < end_datetime:
-            next_hour = current_time + timedelta(hours=1)
-            bucket_name = f"{current_time.hour}-{next_hour.hour % 24}"
-
-            if bucket_name not in seen_buckets:
-                buckets.append(bucket_name)
-                seen_buckets.add(bucket_name)
-
-            current_time = next_hour
-
-        # Count orders into buckets
-        bucket_counts = {b: 0 for b in buckets}
-        for order in data:
-            created_str = order.get("created_at")
-            if not created_str:
-                continue
-            try:
-                created = datetime.strptime(created_str, "%Y-%m-%d %H:%M:%S")
-                order_bucket = f"{created.hour}-{(created.hour + 1) % 24}"
-                if order_bucket in bucket_counts:
-                    bucket_counts[order_bucket] += 1
-            except:
-                continue
-
-        # ✅ Sort the buckets by starting hour
-        sorted_buckets = sorted(
-            bucket_counts.keys(), key=lambda x: int(x.split("-")[0])
-        )
-        sorted_bucket_counts = {b: bucket_counts[b] for b in sorted_buckets}
-
-        # Split into 2 charts if number of buckets > 10
-        if len(sorted_buckets) > 10:
-            mid = len(sorted_buckets) // 2
-            return {
-                f"{sorted_buckets[0]} to {sorted_buckets[mid-1]}": {
-                    b: sorted_bucket_counts[b] for b in sorted_buckets[:mid]
-                },
-                f"{sorted_buckets[mid]} to {sorted_buckets[-1]}": {
-                    b: sorted_bucket_counts[b] for b in sorted_buckets[mid:]
-                },
-            }
-        else:
-            return {
-                f"{sorted_buckets[0]} to {sorted_buckets[-1]}": sorted_bucket_counts
-            }
-
-    def table_data_rows(data):
-        clients = defaultdict(
-            lambda: {
-                "Amount": 0,
-                "Orders": 0,
-                "DeliveryTimes": [],
-                "AssignTimes": [],
-                "PickupWaits": [],
-                "TravelTimes": [],
-                "DropoffWaits": [],
-            }
-        )
-
-        def parse_dt(ts):
-            return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S") if ts else None
-
-        for order in data:
-            client = order.get("user_name", "Unknown")
-            amount_str = order.get("amount")
-
-            # Parse amount
-            try:
-                amount = round(abs(float(amount_str)), 2)
-            except:
-                amount = 0
-
-            # Parse timestamps
-            created = parse_dt(order.get("created_at"))
-            pickup = order.get("pickup_task", {})
-            delivery = order.get("delivery_task", {})
-
-            pickup_assigned = parse_dt(pickup.get("assigned_at"))
-            pickup_arrived = parse_dt(pickup.get("arrived_at"))
-            pickup_success = parse_dt(pickup.get("successful_at"))
-
-            delivery_started = parse_dt(delivery.get("started_at"))
-            delivery_arrived = parse_dt(delivery.get("arrived_at"))
-            delivery_success = parse_dt(delivery.get("successful_at"))
-
-            # Delivery time (created → delivery success)
-            if created and delivery_success:
-                clients[client]["DeliveryTimes"].append(
-                    (delivery_success - created).total_seconds() / 60
-                )
-
-            # Time to assign
-            if created and pickup_assigned:
-                clients[client]["AssignTimes"].append(
-                    (pickup_assigned - created).total_seconds() / 60
-                )
-
-            # Pickup waiting
-            if pickup_success and pickup_arrived:
-                clients[client]["PickupWaits"].append(
-                    (pickup_success - pickup_arrived).total_seconds() / 60
-                )
-
-            # Travel to customer
-            if delivery_arrived and delivery_started:
-                clients[client]["TravelTimes"].append(
-                    (delivery_arrived - delivery_started).total_seconds() / 60
-                )
-
-            # Dropoff waiting
-            if delivery_success and delivery_arrived:
-                clients[client]["DropoffWaits"].append(
-                    (delivery_success - delivery_arrived).total_seconds() / 60
-                )
-
-            # Update fare & orders
-            clients[client]["Amount"] += amount
-            clients[client]["Orders"] += 1
-
-        # ---- Build final rows ----
+    def table_data_rows(clients):
         rows = []
         for client, stats in clients.items():
-
-            def avg(lst):
-                return round(sum(lst) / len(lst), 2) if lst else None
-
-            avg_time = avg(stats["DeliveryTimes"])
-            avg_assign = avg(stats["AssignTimes"])
-            avg_pickup_wait = avg(stats["PickupWaits"])
-            avg_travel = avg(stats["TravelTimes"])
-            avg_dropoff_wait = avg(stats["DropoffWaits"])
-
             avg_fare = (
-                round(stats["Amount"] / stats["Orders"], 2)
+                round(stats_amount(stats) / stats["Orders"], 2)
                 if stats["Orders"] > 0
                 else 0
             )
@@ -557,48 +1320,49 @@ def reports_client(data, start_dt, end_dt):
                 {
                     "Client": client,
                     "Orders": stats["Orders"],
-                    "Total Fare": round(stats["Amount"], 2),
+                    "Total Fare": round(stats_amount(stats), 2),
                     "Average Fare": avg_fare,
-                    "Average Delivery Time (min)": avg_time,
-                    "Avg Time to Assign (min)": avg_assign,
-                    "Avg Pickup Waiting (min)": avg_pickup_wait,
-                    "Avg Travel to Customer (min)": avg_travel,
-                    "Avg Dropoff Waiting (min)": avg_dropoff_wait,
+                    "Average Delivery Time (min)": average(stats["DeliveryTimes"]),
+                    "Avg Time to Assign (min)": average(stats["AssignTimes"]),
+                    "Avg Pickup Waiting (min)": average(stats["PickupWaits"]),
+                    "Avg Travel to Customer (min)": average(stats["TravelTimes"]),
+                    "Avg Dropoff Waiting (min)": average(stats["DropoffWaits"]),
                 }
             )
 
         return rows
 
-    # Extract just the time components for chart creation
-    start_time = start_dt.time()
-    end_time = end_dt.time()
-
     # ---- Build the summary ----
     summary = {
-        "number_of_orders": count_orders(data),
-        "total_fare": total_fare(data),
-        "average_fare": average_fare(data),
-        "average_delivery_time": average_time_taken(data),
-        "charts": charts_per_time_slot(data, start_time, end_time),
-        "table": table_data_rows(data),
+        "number_of_orders": num_orders,
+        "total_fare": fare,
+        "average_fare": round(fare / num_orders, 2) if num_orders > 0 else 0,
+        "average_delivery_time": average(totals["DeliveryTimes"], 0),
+        "charts": time_charts(
+            created_epochs(aggs),
+            granularity,
+            start_dt.time(),
+            end_dt.time(),
+            start_dt.date(),
+            end_dt.date(),
+            chart_size,
+        ),
+        "table": table_data_rows(aggs["client"]),
     }
 
     return summary
 
 
 def reports_transaction_history(data):
-    def parse_dt(ts):
-        return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S") if ts else None
-
-    def minutes_diff(start, end):
-        return round((end - start).total_seconds() / 60, 2) if start and end else None
+    def minutes_diff(minutes):
+        return round(minutes, 2) if minutes is not None else None
 
     # --- Summary helpers ---
     def count_orders(data):
         return len(data)
 
     def total_fare(data):
-        return round(sum(abs(float(order["amount"])) for order in data), 2)
+        return round(sum(record.fare for record in data), 2)
 
     def average_fare(data):
         num_orders = count_orders(data)
@@ -607,57 +1371,34 @@ def reports_transaction_history(data):
     def average_delivery_time(data):
         total_minutes = 0
         count = 0
-        for order in data:
-            created = parse_dt(order.get("created_at"))
-            successful = parse_dt(order.get("delivery_task", {}).get("successful_at"))
-            if created and successful:
-                total_minutes += (successful - created).total_seconds() / 60
+        for record in data:
+            if record.stages[0] is not None:
+                total_minutes += record.stages[0]
                 count += 1
         return round(total_minutes / count, 2) if count > 0 else 0
 
     # --- Table rows ---
     rows = []
-    for order in data:
-        pickup = order.get("pickup_task", {})
-        delivery = order.get("delivery_task", {})
-
-        # Parse timestamps
-        created = parse_dt(order.get("created_at"))
-        pickup_assigned = parse_dt(pickup.get("assigned_at"))
-        pickup_arrived = parse_dt(pickup.get("arrived_at"))
-        pickup_success = parse_dt(pickup.get("successful_at"))
-        delivery_started = parse_dt(delivery.get("started_at"))
-        delivery_arrived = parse_dt(delivery.get("arrived_at"))
-        delivery_success = parse_dt(delivery.get("successful_at"))
-
-        # Calculate times
-        delivery_time = minutes_diff(created, delivery_success)  # Full cycle
-        assign_time = minutes_diff(created, pickup_assigned)  # Order → assigned
-        pickup_wait = minutes_diff(
-            pickup_arrived, pickup_success
-        )  # Driver waiting at pickup
-        travel_time = minutes_diff(
-            delivery_started, delivery_arrived
-        )  # Pickup → arrival at delivery
-        dropoff_wait = minutes_diff(
-            delivery_arrived, delivery_success
-        )  # Arrival → successful dropoff
+    for record in data:
+        delivery_time, assign_time, pickup_wait, travel_time, dropoff_wait = (
+            record.stages
+        )
 
         rows.append(
             {
-                "pickup_name": order.get("user_name"),
-                "driver_name": pickup.get("driver_name"),
-                "amount": abs(float(order.get("amount", 0))),
-                "order_id": order.get("reference"),
-                "status": order.get("status"),
-                "pickup_address": pickup.get("address"),
-                "delivery_address": delivery.get("address"),
-                "created_at": order.get("created_at"),
-                "delivery_time_min": delivery_time,
-                "assign_time_min": assign_time,
-                "pickup_wait_min": pickup_wait,
-                "travel_time_min": travel_time,
-                "dropoff_wait_min": dropoff_wait,
+                "pickup_name": raw_value(CLIENTS.values[record.client]),
+                "driver_name": raw_value(DRIVERS.values[record.driver]),
+                "amount": record.fare,
+                "order_id": record.reference,
+                "status": STATUSES.values[record.status],
+                "pickup_address": record.pickup_address,
+                "delivery_address": record.delivery_address,
+                "created_at": record.created_at,
+                "delivery_time_min": minutes_diff(delivery_time),  # Full cycle
+                "assign_time_min": minutes_diff(assign_time),  # Order → assigned
+                "pickup_wait_min": minutes_diff(pickup_wait),  # Waiting at pickup
+                "travel_time_min": minutes_diff(travel_time),  # Pickup → delivery
+                "dropoff_wait_min": minutes_diff(dropoff_wait),  # Arrival → dropoff
             }
         )
 
@@ -671,7 +1412,152 @@ def reports_transaction_history(data):
     }
 
 
+def compare_options():
+    """Read and validate the compare_to query parameter."""
+    compare_to = request.args.get("compare_to")
+    if compare_to is not None and compare_to not in COMPARE_TO:
+        raise ValueError(f"compare_to must be one of {', '.join(COMPARE_TO)}")
+    return compare_to
+
+
+def previous_range(start, end, compare_to):
+    if compare_to == "previous_period":
+        length = (end - start).days + 1
+        return start - timedelta(days=length), start - timedelta(days=1)
+
+    def year_before(day):
+        try:
+            return day.replace(year=day.year - 1)
+        except ValueError:  # Feb 29
+            return day.replace(year=day.year - 1, day=28)
+
+    return year_before(start), year_before(end)
+
+
+def merge_aggregates(parts):
+    merged = new_aggregates()
+
+    def merge_stats(target, stats):
+        target["Orders"] += stats["Orders"]
+        target["Amount"] += stats["Amount"]
+        target["Fare"] += stats["Fare"]
+        for metric in STAGE_METRICS:
+            target[metric][0] += stats[metric][0]
+            target[metric][1] += stats[metric][1]
+        if "latitude" in stats and "latitude" not in target:
+            target["latitude"] = stats["latitude"]
+            target["longitude"] = stats["longitude"]
+
+    parts = list(parts)
+    for aggs in parts:
+        merge_stats(merged["totals"], aggs["totals"])
+        for dimension in ("client", "driver", "group", "area"):
+            for name, stats in aggs[dimension].items():
+                merge_stats(merged[dimension][name], stats)
+    merged["created"] = np.concatenate(
+        [created_epochs(aggs) for aggs in parts] + [np.empty(0, np.int64)]
+    )
+    return merged
+
+
+# Per-day rollups live apart from the report cache so their long TTL doesn't
+# take up room meant for reports
+_rollups = ExpiringCache(ROLLUP_CACHE_MAX_ENTRIES)
+
+
+def rollup_aggregates(start, end, filter_key, filter_records):
+    """Aggregates for start..end merged from cached per-day rollups.
+
+    Days without a cached rollup are loaded with a single getData call,
+    filtered, split by created day and cached. Rollups keep their orders'
+    created epochs as an array, for the time charts.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    parts = {}
+    missing = []
+    for day in days:
+        cached = _rollups.get((filter_key, day))
+        if cached is None:
+            missing.append(day)
+        else:
+            parts[day] = cached
+
+    if missing:
+        data = getData(missing[0].isoformat(), missing[-1].isoformat(), "all")
+        by_day = defaultdict(list)
+        for record in filter_records(data):
+            if record.created is not None:
+                by_day[record.created // 86400].append(record)
+
+        for day in missing:
+            aggs = aggregate_orders(by_day.get((day - EPOCH.date()).days, []))
+            aggs["created"] = created_epochs(aggs)
+            parts[day] = aggs
+            # Unsettled days (e.g. yesterday) can still change upstream
+            ttl = DAY_ROLLUP_TTL if day <= last_closed_day() else REPORT_CACHE_TTL
+            _rollups.set((filter_key, day), aggs, ttl)
+
+    return merge_aggregates(parts[day] for day in days)
+
+
+def compare_reports(current, previous, table_key, row_key, totals_key=None):
+    """Deltas of every numeric total and table row against an earlier report.
+
+    Rows missing from one side count as zero, except averages, which have no
+    value to compare against.
+    """
+
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def compare(current_value, previous_value):
+        result = {"current": current_value, "previous": previous_value}
+        if is_number(current_value) and is_number(previous_value):
+            result["delta"] = round(current_value - previous_value, 2)
+            result["delta_pct"] = (
+                round((current_value - previous_value) / previous_value * 100, 2)
+                if previous_value
+                else None
+            )
+        else:
+            result["delta"] = result["delta_pct"] = None
+        return result
+
+    def missing_value(field, value):
+        is_average = field.startswith(("Average", "Avg"))
+        return 0 if is_number(value) and not is_average else None
+
+    current_totals = current[totals_key] if totals_key else current
+    previous_totals = previous[totals_key] if totals_key else previous
+    totals = {
+        key: compare(value, previous_totals.get(key))
+        for key, value in current_totals.items()
+        if is_number(value)
+    }
+
+    current_rows = {row[row_key]: row for row in current[table_key]}
+    previous_rows = {row[row_key]: row for row in previous[table_key]}
+    table = []
+    names = list(current_rows) + [n for n in previous_rows if n not in current_rows]
+    for name in names:
+        current_row = current_rows.get(name)
+        previous_row = previous_rows.get(name)
+        sample = current_row or previous_row
+        row = {row_key: name}
+        for field, value in sample.items():
+            if field == row_key or not (is_number(value) or value is None):
+                continue
+            row[field] = compare(
+                current_row[field] if current_row else missing_value(field, value),
+                previous_row[field] if previous_row else missing_value(field, value),
+            )
+        table.append(row)
+
+    return {"totals": totals, "table": table}
+
+
 @app.route("/client_report", methods=["GET"])
+@cached_report
 def generate_client_report():
     # Read query parameters
     start_date = request.args.get("start_date")  # e.g. "2025-01-01"
@@ -681,75 +1567,132 @@ def generate_client_report():
     start_time = request.args.get("start_time", "00:00")
     end_time = request.args.get("end_time", "23:59")
 
+    try:
+        chart_opts = chart_options()
+        compare_to = compare_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     # Parse dates
     start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
     end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
     start_time_obj = datetime.strptime(start_time, "%H:%M").time()
     end_time_obj = datetime.strptime(end_time, "%H:%M").time()
 
-    # Fetch base data for the entire date range
-    data = getData(start_date, end_date, "all")
+    # Create dummy datetime objects for the reports_client function
+    start_dt = datetime.combine(start_date_obj, start_time_obj)
+    end_dt = datetime.combine(end_date_obj, end_time_obj)
 
-    # ✅ NEW: Filter by daily time ranges
-    def is_within_daily_time_range(order_datetime, start_time, end_time):
-        """Check if order time falls within the daily time range."""
-        order_time = order_datetime.time()
+    # ✅ Normalize filter_by list to lowercase
+    filter_by_lower = [f.lower() for f in filter_by]
+
+    # Daily time range in seconds since midnight
+    start_second = start_time_obj.hour * 3600 + start_time_obj.minute * 60
+    end_second = end_time_obj.hour * 3600 + end_time_obj.minute * 60
 
+    def is_within_daily_time_range(second):
+        """Check if order time falls within the daily time range."""
         # Handle overnight time ranges (e.g., 22:00 to 05:00)
-        if end_time < start_time:
+        if end_second < start_second:
             # Overnight: order should be after start_time OR before end_time
-            return order_time >= start_time or order_time <= end_time
+            return second >= start_second or second <= end_second
         else:
             # Same day: order should be between start_time and end_time
-            return start_time <= order_time <= end_time
+            return start_second <= second <= end_second
 
-    # ✅ Filter by date range AND daily time range
-    filtered_data = []
-    for order in data:
-        try:
-            order_datetime = datetime.strptime(order["created_at"], "%Y-%m-%d %H:%M:%S")
-            order_date = order_datetime.date()
-
-            # Check if order is within the date range
-            if start_date_obj <= order_date <= end_date_obj:
-                # Check if order time is within the daily time range
-                if is_within_daily_time_range(
-                    order_datetime, start_time_obj, end_time_obj
-                ):
-                    filtered_data.append(order)
-        except:
-            continue
+    def filter_records(data):
+        # ✅ Filter by daily time range
+        data = [
+            record
+            for record in data
+            if record.created is not None
+            and is_within_daily_time_range(record.created % 86400)
+        ]
 
-    # ✅ Normalize filter_by list to lowercase
-    filter_by_lower = [f.lower() for f in filter_by]
+        # ✅ Filter by clients (only if not ["all"])
+        if filter_by_lower and not (
+            len(filter_by_lower) == 1 and filter_by_lower[0] == "all"
+        ):
+            clients = CLIENTS.matching(
+                lambda name: isinstance(name, str) and name.lower() in filter_by_lower
+            )
+            data = [record for record in data if record.client in clients]
 
-    # ✅ Filter by clients (only if not ["all"])
-    if filter_by_lower and not (
-        len(filter_by_lower) == 1 and filter_by_lower[0] == "all"
+        # ✅ Filter by status (only if not "all")
+        if status.lower() != "all":
+            statuses = STATUSES.matching(lambda s: str(s).lower() == status.lower())
+            data = [record for record in data if record.status in statuses]
+
+        return data
+
+    filter_key = (
+        "client",
+        tuple(sorted(filter_by_lower)),
+        status.lower(),
+        start_time,
+        end_time,
+    )
+
+    # ✅ Today's unfiltered full-day report comes from the running aggregates
+    if (
+        is_today(start_date, end_date)
+        and all(f == "all" for f in filter_by_lower)
+        and status.lower() == "all"
+        and (start_time, end_time) == ("00:00", "23:59")
     ):
-        filtered_data = [
-            order
-            for order in filtered_data
-            if order.get("user_name", "").lower() in filter_by_lower
-        ]
+        summary = today_window.report(
+            reports_client,
+            start_dt,
+            end_dt,
+            chart_opts["granularity"],
+            chart_opts["chart_size"],
+        )
+    elif compare_to:
+        # ✅ Built from the same per-day rollups as the comparison
+        aggs = rollup_aggregates(
+            start_date_obj, end_date_obj, filter_key, filter_records
+        )
+        summary = reports_client(aggs, start_dt, end_dt, **chart_opts)
+    else:
+        # Fetch base data for the entire date range
+        data = getData(start_date, end_date, "all")
+
+        # ✅ Filter by date range, then time range, clients and status
+        first_day = (start_date_obj - EPOCH.date()).days
+        last_day = (end_date_obj - EPOCH.date()).days
+        filtered_data = filter_records(
+            [
+                record
+                for record in data
+                if record.created is not None
+                and first_day <= record.created // 86400 <= last_day
+            ]
+        )
 
-    # ✅ Filter by status (only if not "all")
-    if status.lower() != "all":
-        filtered_data = [
-            order
-            for order in filtered_data
-            if order.get("status", "").lower() == status.lower()
-        ]
+        summary = reports_client(
+            aggregate_orders(filtered_data), start_dt, end_dt, **chart_opts
+        )
 
-    # Create dummy datetime objects for the reports_client function
-    start_dt = datetime.combine(start_date_obj, start_time_obj)
-    end_dt = datetime.combine(end_date_obj, end_time_obj)
+    # ✅ Compare against an earlier range using cached per-day rollups
+    if compare_to:
+        prev_start, prev_end = previous_range(start_date_obj, end_date_obj, compare_to)
+        previous = reports_client(
+            rollup_aggregates(prev_start, prev_end, filter_key, filter_records),
+            datetime.combine(prev_start, start_time_obj),
+            datetime.combine(prev_end, end_time_obj),
+        )
+        summary["comparison"] = {
+            "compare_to": compare_to,
+            "start_date": prev_start.isoformat(),
+            "end_date": prev_end.isoformat(),
+            **compare_reports(summary, previous, "table", "Client"),
+        }
 
-    summary = reports_client(filtered_data, start_dt, end_dt)
     return jsonify(summary)
 
 
 @app.route("/3pl_report", methods=["GET"])
+@cached_report
 def generate_3pl_report():
     # Read query parameters
     start_date = request.args.get("start_date")
@@ -757,60 +1700,128 @@ def generate_3pl_report():
     filter_by = request.args.getlist("filter_by")  # ✅ get multiple values as list
     status = request.args.get("status", "all")
 
-    data = getData(start_date, end_date, "all")
+    try:
+        chart_opts = chart_options()
+        compare_to = compare_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    chart_opts["start_date"] = datetime.strptime(start_date, "%Y-%m-%d").date()
+    chart_opts["end_date"] = datetime.strptime(end_date, "%Y-%m-%d").date()
 
     print("filter_by:", filter_by)
 
-    if filter_by and not ("all" in [f.lower() for f in filter_by]):
-        data = [
-            order
-            for order in data
-            if any(
-                (
-                    (order.get("pickup_task", {}).get("driver_name") or "")
-                    .strip()
-                    .split(" ")[-1]
-                    .upper()
-                    == f.upper()
-                )
-                for f in filter_by
-                if (order.get("pickup_task", {}).get("driver_name") or "").strip()
-            )
-        ]
+    def filter_records(data):
+        if filter_by and not ("all" in [f.lower() for f in filter_by]):
+            wanted = {f.upper() for f in filter_by}
+            groups = GROUPS.matching(lambda group: group in wanted)
+            data = [record for record in data if record.group in groups]
 
-    # ✅ Filter by status if not ALL
-    if status != "all":
-        data = [
-            order for order in data if str(order.get("status", "")).lower() == status
-        ]
+        # ✅ Filter by status if not ALL
+        if status != "all":
+            statuses = STATUSES.matching(lambda s: str(s).lower() == status)
+            data = [record for record in data if record.status in statuses]
+
+        return data
+
+    filter_key = ("3pl", tuple(sorted(f.upper() for f in filter_by)), status)
+
+    # ✅ Today's unfiltered report comes from the running aggregates
+    if (
+        is_today(start_date, end_date)
+        and (not filter_by or "all" in [f.lower() for f in filter_by])
+        and status == "all"
+    ):
+        summary = today_window.report(reports_3pl, chart_opts)
+    elif compare_to:
+        # ✅ Built from the same per-day rollups as the comparison
+        aggs = rollup_aggregates(
+            chart_opts["start_date"], chart_opts["end_date"], filter_key, filter_records
+        )
+        summary = reports_3pl(aggs, chart_opts)
+    else:
+        data = filter_records(getData(start_date, end_date, "all"))
+        summary = reports_3pl(aggregate_orders(data), chart_opts)
+
+    # ✅ Compare against an earlier range using cached per-day rollups
+    if compare_to:
+        prev_start, prev_end = previous_range(
+            chart_opts["start_date"], chart_opts["end_date"], compare_to
+        )
+        previous = reports_3pl(
+            rollup_aggregates(prev_start, prev_end, filter_key, filter_records)
+        )
+        summary["comparison"] = {
+            "compare_to": compare_to,
+            "start_date": prev_start.isoformat(),
+            "end_date": prev_end.isoformat(),
+            **compare_reports(summary, previous, "table_data", "Driver"),
+        }
 
-    print(data)
-    summary = reports_3pl(data)
     return jsonify(summary)
 
 
 @app.route("/area-report", methods=["GET"])
+@cached_report
 def generate_area_report():
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
     filter_by = request.args.getlist("filter_by")
     status = request.args.get("status", "all")
 
-    # Fetch base data for the entire date range
-    data = getData(start_date, end_date, "all")
-
-    # ✅ Filter by status if not ALL
-    if status != "all":
-        data = [
-            order for order in data if str(order.get("status", "")).lower() == status
-        ]
+    try:
+        chart_opts = chart_options()
+        compare_to = compare_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    chart_opts["start_date"] = datetime.strptime(start_date, "%Y-%m-%d").date()
+    chart_opts["end_date"] = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    def filter_records(data):
+        # ✅ Filter by status if not ALL
+        if status != "all":
+            statuses = STATUSES.matching(lambda s: str(s).lower() == status)
+            data = [record for record in data if record.status in statuses]
+        return data
+
+    # ✅ Today's unfiltered report comes from the running aggregates
+    if is_today(start_date, end_date) and status == "all":
+        final_data = today_window.report(reports_area, chart_opts)
+    elif compare_to:
+        # ✅ Built from the same per-day rollups as the comparison
+        aggs = rollup_aggregates(
+            chart_opts["start_date"],
+            chart_opts["end_date"],
+            ("area", status),
+            filter_records,
+        )
+        final_data = reports_area(aggs, chart_opts)
+    else:
+        # Fetch base data for the entire date range
+        data = filter_records(getData(start_date, end_date, "all"))
+
+        # Pickup areas are resolved once, when orders are normalized
+        final_data = reports_area(aggregate_orders(data), chart_opts)
+
+    # ✅ Compare against an earlier range using cached per-day rollups
+    if compare_to:
+        prev_start, prev_end = previous_range(
+            chart_opts["start_date"], chart_opts["end_date"], compare_to
+        )
+        previous = reports_area(
+            rollup_aggregates(prev_start, prev_end, ("area", status), filter_records)
+        )
+        final_data["comparison"] = {
+            "compare_to": compare_to,
+            "start_date": prev_start.isoformat(),
+            "end_date": prev_end.isoformat(),
+            **compare_reports(final_data, previous, "table", "Area", "statcards"),
+        }
 
-    data_with_pickupAreas = formatAreas(data)
-    final_data = reports_area(data_with_pickupAreas)
     return jsonify(final_data)
 
 
 @app.route("/transaction_history_report", methods=["GET"])
+@cached_report
 def generate_transaction_history_report():
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
@@ -822,21 +1833,387 @@ def generate_transaction_history_report():
 
     # ✅ Filter by clients (only if not ["all"])
     if filter_by and not ("all" in [f.lower() for f in filter_by]):
-        data = [
-            order
-            for order in data
-            if order.get("user_name", "").lower() in [f.lower() for f in filter_by]
-        ]
+        filter_by_lower = [f.lower() for f in filter_by]
+        clients = CLIENTS.matching(
+            lambda name: isinstance(name, str) and name.lower() in filter_by_lower
+        )
+        data = [record for record in data if record.client in clients]
 
     # ✅ Filter by status if not ALL
     if status != "all":
-        data = [
-            order for order in data if str(order.get("status", "")).lower() == status
-        ]
-    
+        statuses = STATUSES.matching(lambda s: str(s).lower() == status)
+        data = [record for record in data if record.status in statuses]
+
     final_data = reports_transaction_history(data)
     return jsonify(final_data)
 
 
+REPORT_JOB_TYPES = {
+    "client_report": "generate_client_report",
+    "3pl_report": "generate_3pl_report",
+    "area-report": "generate_area_report",
+    "transaction_history_report": "generate_transaction_history_report",
+}
+
+
+class ReportJob:
+    def __init__(self, report, params, key):
+        self.id = uuid.uuid4().hex
+        self.report = report
+        self.params = params
+        self.key = key
+        self.status = "queued"  # → running → done / failed, or cancelled
+        self.error = None
+        self.error_status = None
+        self.result = None  # response body, kept until the job is pruned
+        self.last_polled = monotonic()
+        self.finished_at = None
+
+    def to_json(self):
+        job = {
+            "id": self.id,
+            "report": self.report,
+            "status": self.status,
+            "status_url": f"/report_jobs/{self.id}",
+            "result_url": f"/report_jobs/{self.id}/result",
+        }
+        if self.error:
+            job["error"] = self.error
+        return job
+
+
+_jobs = {}
+_pending_jobs = {}  # report cache key → queued/running job, for deduplication
+_jobs_lock = threading.Lock()
+_job_queue = queue.Queue(maxsize=REPORT_JOB_QUEUE_SIZE)
+_job_workers = []
+
+
+def finish_report_job(job, status, error=None, error_status=None, result=None):
+    with _jobs_lock:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.error_status = error_status
+        job.finished_at = monotonic()
+        _pending_jobs.pop(job.key, None)
+
+
+def run_report_job(job):
+    endpoint = REPORT_JOB_TYPES[job.report]
+    try:
+        # Runs the normal view, so the result lands in the report cache
+        with app.test_request_context(
+            next(app.url_map.iter_rules(endpoint)).rule,
+            query_string=MultiDict(job.params),
+        ):
+            response = app.view_functions[endpoint]()
+    except requests.RequestException as e:
+        finish_report_job(job, "failed", str(e), 502)
+        return
+    except Exception as e:
+        finish_report_job(job, "failed", str(e), 500)
+        return
+
+    if isinstance(response, tuple):
+        response, status_code = response
+        finish_report_job(job, "failed", response.get_json().get("error"), status_code)
+    else:
+        finish_report_job(job, "done", result=response.get_data())
+
+
+def _report_job_worker():
+    while True:
+        job = _job_queue.get()
+        try:
+            with _jobs_lock:
+                if job.status != "queued":
+                    continue
+                abandoned = monotonic() - job.last_polled > REPORT_JOB_ABANDON_AFTER
+                if not abandoned:
+                    job.status = "running"
+            if abandoned:
+                finish_report_job(job, "cancelled", "No client polled for the job")
+                continue
+            run_report_job(job)
+        finally:
+            _job_queue.task_done()
+
+
+def start_report_job_workers():
+    with _jobs_lock:
+        while len(_job_workers) < REPORT_JOB_WORKERS:
+            worker = threading.Thread(
+                target=_report_job_worker,
+                name=f"report-job-{len(_job_workers)}",
+                daemon=True,
+            )
+            worker.start()
+            _job_workers.append(worker)
+
+
+def prune_report_jobs():
+    now = monotonic()
+    with _jobs_lock:
+        for job_id in [
+            job_id
+            for job_id, job in _jobs.items()
+            if job.finished_at and now - job.finished_at > REPORT_JOB_TTL
+        ]:
+            del _jobs[job_id]
+
+
+def find_report_job(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job:
+            job.last_polled = monotonic()
+        return job
+
+
+@app.route("/report_jobs", methods=["POST"])
+def create_report_job():
+    # Body: {"report": "client_report", "params": {"start_date": ..., ...}}
+    body = request.get_json(silent=True) or {}
+    report = body.get("report")
+    params = body.get("params") or {}
+
+    if report not in REPORT_JOB_TYPES:
+        error = f"report must be one of {', '.join(REPORT_JOB_TYPES)}"
+        return jsonify({"error": error}), 400
+    if not isinstance(params, dict):
+        return jsonify({"error": "params must be an object"}), 400
+    # Only what a query string can carry, so the cache key matches the GET routes
+    for name, value in params.items():
+        values = value if isinstance(value, list) else [value]
+        if not all(isinstance(v, str) for v in values):
+            error = f"params.{name} must be a string or a list of strings"
+            return jsonify({"error": error}), 400
+    # Validated here so a job that fails while running is a server error
+    for name, fmt, label, default in [
+        ("start_date", "%Y-%m-%d", "YYYY-MM-DD", None),
+        ("end_date", "%Y-%m-%d", "YYYY-MM-DD", None),
+        ("start_time", "%H:%M", "HH:MM", "00:00"),
+        ("end_time", "%H:%M", "HH:MM", "23:59"),
+    ]:
+        try:
+            datetime.strptime(params.get(name, default), fmt)
+        except (TypeError, ValueError):
+            return jsonify({"error": f"params.{name} must be {label}"}), 400
+
+    prune_report_jobs()
+    key = report_cache_key(REPORT_JOB_TYPES[report], MultiDict(params))
+
+    with _jobs_lock:
+        # ✅ Identical jobs that are still pending share one run
+        pending = _pending_jobs.get(key)
+        if pending:
+            pending.last_polled = monotonic()
+            return jsonify(pending.to_json()), 202
+
+        job = ReportJob(report, params, key)
+        job.result = cache_get(key)
+        if job.result is not None:
+            job.status = "done"
+            job.finished_at = monotonic()
+        else:
+            try:
+                _job_queue.put_nowait(job)
+            except queue.Full:
+                error = "Too many report jobs queued, retry later"
+                response = jsonify({"error": error})
+                response.headers["Retry-After"] = str(REPORT_JOB_RETRY_AFTER)
+                return response, 429
+            _pending_jobs[key] = job
+        _jobs[job.id] = job
+
+    start_report_job_workers()
+    return jsonify(job.to_json()), 202
+
+
+@app.route("/report_jobs/<job_id>", methods=["GET"])
+def get_report_job(job_id):
+    job = find_report_job(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_json())
+
+
+@app.route("/report_jobs/<job_id>/result", methods=["GET"])
+def get_report_job_result(job_id):
+    job = find_report_job(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    if job.status in ("queued", "running"):
+        return jsonify(job.to_json()), 202
+    if job.status == "failed":
+        return jsonify(job.to_json()), job.error_status
+    if job.status == "cancelled":
+        return jsonify(job.to_json()), 409
+
+    return app.response_class(job.result, mimetype="application/json")
+
+
+@app.route("/report_jobs/<job_id>", methods=["DELETE"])
+def cancel_report_job(job_id):
+    job = find_report_job(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    with _jobs_lock:
+        if job.status == "running":
+            return jsonify({"error": "Job is already running"}), 409
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = monotonic()
+            _pending_jobs.pop(job.key, None)
+    return jsonify(job.to_json())
+
+
+@app.cli.command("import-snapshots")
+@click.argument("paths", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def import_snapshots_command(paths):
+    """Import JSONL dumps of orders into the snapshot store.
+
+    Each line holds one order or a JSON array of orders. Orders are merged
+    into their day's snapshot by reference.
+    """
+    by_day = defaultdict(list)
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                for order in record if isinstance(record, list) else [record]:
+                    day = snapshot_day_of(order)
+                    if day:
+                        by_day[day].append(order)
+
+    for day, orders in sorted(by_day.items()):
+        merged = {}
+        for order in (load_snapshot(day) or []) + orders:
+            merged[order.get("reference") or json.dumps(order, sort_keys=True)] = order
+        save_snapshot(day, list(merged.values()))
+        click.echo(f"{day}: {len(orders)} imported, {len(merged)} stored")
+
+
+@app.cli.command("compact-snapshots")
+def compact_snapshots_command():
+    """Fold old day snapshots into month files and apply retention."""
+    with upstream_lock():
+        compact_snapshots()
+
+
+WARM_ENDPOINTS = [
+    "generate_client_report",
+    "generate_3pl_report",
+    "generate_area_report",
+    "generate_transaction_history_report",
+]
+
+_warmer_thread = None
+_last_compaction = None
+
+
+@contextmanager
+def upstream_lock():
+    """Serialize upstream refreshes across gunicorn workers on this host."""
+    with open(CACHE_WARM_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def warm_data_path(day):
+    return os.path.join(CACHE_WARM_DATA_DIR, f"{day.isoformat()}.arrow")
+
+
+def warm_data_age(day):
+    """Seconds since the shared copy of a day was fetched, or None."""
+    try:
+        return datetime.now().timestamp() - os.path.getmtime(warm_data_path(day))
+    except OSError:
+        return None
+
+
+def publish_warm_data(day, orders):
+    day_str = day.isoformat()
+    table = orders_to_table(orders, [day_str] * len(orders), [day_str])
+    write_snapshot_table(table, warm_data_path(day))
+
+
+def warm_report_cache():
+    """Precompute yesterday's and today's default reports in this worker.
+
+    Under the upstream lock, days whose shared copy is older than
+    CACHE_WARM_INTERVAL are refetched and published to CACHE_WARM_DATA_DIR,
+    so one worker per host fetches them. Every worker then rebuilds its own
+    caches and today's window from the shared copy. Also compacts the
+    snapshot store once a day.
+    """
+    global _last_compaction
+    today = date.today()
+    days = (today - timedelta(days=1), today)
+    with upstream_lock():
+        if SNAPSHOT_DIR and _last_compaction != today:
+            compact_snapshots(today)
+            _last_compaction = today
+
+        for day in days:
+            age = warm_data_age(day)
+            if age is None or age >= CACHE_WARM_INTERVAL:
+                day_str = day.isoformat()
+                publish_warm_data(day, fetchTransactions(day_str, day_str, "all"))
+
+        # Drop shared copies of earlier days
+        keep = {os.path.basename(warm_data_path(day)) for day in days}
+        for filename in os.listdir(CACHE_WARM_DATA_DIR):
+            if filename.endswith(".arrow") and filename not in keep:
+                os.remove(os.path.join(CACHE_WARM_DATA_DIR, filename))
+
+    for day in days:
+        day_str = day.isoformat()
+        age = warm_data_age(day)
+        orders = table_to_orders(read_snapshot_table(warm_data_path(day)))
+        if day == today:
+            today_window.load(orders, monotonic() - age)
+        else:
+            data = normalize_orders(orders)
+            cache_set(("data", day_str, day_str, "all"), data, cache_ttl(day_str))
+
+        for endpoint in WARM_ENDPOINTS:
+            with app.test_request_context(
+                next(app.url_map.iter_rules(endpoint)).rule,
+                query_string={"start_date": day_str, "end_date": day_str},
+                headers={"Cache-Control": "no-cache"},
+            ):
+                app.view_functions[endpoint]()
+
+
+def _cache_warmer_loop():
+    # Warm right away so a fresh worker's first requests are served warm;
+    # the lock keeps workers booted together from all fetching
+    while True:
+        try:
+            warm_report_cache()
+        except Exception as e:
+            print("Cache warming failed:", e)
+        sleep(CACHE_WARM_INTERVAL + random.uniform(0, CACHE_WARM_JITTER))
+
+
+def start_cache_warmer():
+    """Start this process's warmer thread (see gunicorn.conf.py post_fork)."""
+    global _warmer_thread
+    if CACHE_WARM_INTERVAL <= 0 or _warmer_thread is not None:
+        return
+    _warmer_thread = threading.Thread(
+        target=_cache_warmer_loop, name="cache-warmer", daemon=True
+    )
+    _warmer_thread.start()
+
+
 if __name__ == "__main__":
+    start_cache_warmer()
     app.run(debug=False)
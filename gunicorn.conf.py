@@ -0,0 +1,9 @@
+# Loaded by gunicorn from the working directory (see procfile)
+
+
+def post_fork(server, worker):
+    # Each worker has its own report cache, so each runs its own warmer;
+    # starting it here rather than on import keeps CLI commands from warming
+    from app import start_cache_warmer
+
+    start_cache_warmer()
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the suite off the on-disk snapshot store unless a test points it at one
+os.environ["SNAPSHOT_DIR"] = ""
+
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    # areas.json is read relative to the working directory
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture
+def make_orders():
+    """Build raw API orders spread over the days from start."""
+
+    def make(count, start, days=1, seed=1):
+        rnd = random.Random(seed)
+        base = datetime.combine(start, datetime.min.time())
+        orders = []
+        for i in range(count):
+            created = base + timedelta(seconds=rnd.randrange(days * 86400))
+
+            def at(minutes):
+                return (created + timedelta(minutes=minutes)).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
+
+            orders.append(
+                {
+                    "reference": f"R{i}",
+                    "user_name": rnd.choice(["Admin", "V Thru", "Shop X"]),
+                    "amount": str(-round(rnd.uniform(1, 5), 3)),
+                    "status": rnd.choice(["success", "success", "failed"]),
+                    "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+                    "pickup_task": {
+                        "driver_name": rnd.choice(["Ali KEEM", "Bo TALABAT"]),
+                        "address": rnd.choice(["Salmiya", "Sharq", "Nowhere"])
+                        + " block 3",
+                        "assigned_at": at(2),
+                        "arrived_at": at(10),
+                        "successful_at": at(14),
+                    },
+                    "delivery_task": {
+                        "address": "Street 1",
+                        "started_at": at(15),
+                        "arrived_at": at(30),
+                        "successful_at": at(33),
+                    },
+                }
+            )
+        return orders
+
+    return make
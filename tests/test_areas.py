@@ -0,0 +1,41 @@
+import math
+import random
+
+import pytest
+
+import app
+
+
+def brute_force_nearest(points, lat, lon, max_km):
+    lon_scale = math.cos(math.radians(lat))
+    best, best_km = None, max_km
+    for c_lat, c_lon, area in points:
+        km = 111.32 * math.hypot(c_lat - lat, (c_lon - lon) * lon_scale)
+        if km <= best_km:
+            best, best_km = area, km
+    return best
+
+
+@pytest.mark.parametrize("max_km", [0.5, 5, 50, 20000])
+def test_grid_matches_brute_force(max_km):
+    grid = app.load_area_grid()
+    rnd = random.Random(max_km)
+    queries = [
+        (rnd.uniform(28.5, 30.2), rnd.uniform(46.5, 48.5)) for _ in range(500)
+    ] + [(lat, 48.0) for lat in (89.99999, 90, -90, 0)]
+
+    for lat, lon in queries:
+        expected = brute_force_nearest(grid.points, lat, lon, max_km)
+        assert grid.nearest(lat, lon, max_km) == expected
+
+
+def test_unusable_pickup_coordinates_are_ignored():
+    for lat, lon in [("NaN", "48"), ("29", "inf"), ("95", "48"), ("29", "-181")]:
+        assert app.pickup_coordinates({"lat": lat, "lng": lon}) == (None, None)
+    assert app.pickup_coordinates({"lat": "29.3", "lng": "48"}) == (29.3, 48.0)
+
+
+def test_fuzzy_match_skips_phrases_close_to_several_areas():
+    # "salmya" is one edit from both Salmiya and Salmy
+    assert app.fuzzy_area_match("Salmya block 2") is None
+    assert app.fuzzy_area_match("Salmiyya block 2")[0] == "Salmiya"
@@ -0,0 +1,73 @@
+import copy
+from datetime import date
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def upstream(make_orders, monkeypatch):
+    orders = make_orders(3000, date(2025, 2, 15), days=28)
+    calls = []
+
+    def fetch(start_date, end_date, filter_by):
+        calls.append((start_date, end_date))
+        return copy.deepcopy(
+            [o for o in orders if start_date <= o["created_at"][:10] <= end_date]
+        )
+
+    monkeypatch.setattr(app, "fetchTransactions", fetch)
+    monkeypatch.setattr(app, "_cache", app.ExpiringCache(4096))
+    monkeypatch.setattr(app, "_rollups", app.ExpiringCache(4096))
+    return calls
+
+
+@pytest.mark.parametrize(
+    "route, totals_key, fields",
+    [
+        ("3pl_report", None, ["Number of Orders", "Total Fare", "Total Revenue"]),
+        ("client_report", None, ["number_of_orders", "total_fare", "average_fare"]),
+        ("area-report", "statcards", ["number_of_orders", "total_revenue"]),
+    ],
+)
+def test_previous_period_matches_standalone_report(upstream, route, totals_key, fields):
+    client = app.app.test_client()
+    compared = client.get(
+        f"/{route}?start_date=2025-03-08&end_date=2025-03-14"
+        "&compare_to=previous_period"
+    ).get_json()
+    current = client.get(f"/{route}?start_date=2025-03-08&end_date=2025-03-14")
+    previous = client.get(f"/{route}?start_date=2025-03-01&end_date=2025-03-07")
+
+    current, previous = current.get_json(), previous.get_json()
+    if totals_key:
+        current, previous = current[totals_key], previous[totals_key]
+    for field in fields:
+        totals = compared["comparison"]["totals"][field]
+        assert totals["current"] == current[field]
+        assert totals["previous"] == previous[field]
+
+
+def test_comparison_caches_both_periods(upstream):
+    client = app.app.test_client()
+    url = "/3pl_report?start_date=2025-03-08&end_date=2025-03-14"
+    client.get(f"{url}&compare_to=previous_period")
+    client.get(f"{url}&compare_to=previous_period&granularity=date")
+    client.get(f"{url}&compare_to=previous_year&granularity=date")
+
+    # Both weeks once; the year-ago range (before the data) once
+    assert len(upstream) == 3
+
+
+def test_rollups_do_not_evict_reports(monkeypatch):
+    monkeypatch.setattr(app, "_cache", app.ExpiringCache(10))
+    monkeypatch.setattr(app, "_rollups", app.ExpiringCache(10))
+    for day in range(10):
+        app._rollups.set(("area", day), {}, 7 * 86400)
+    for i in range(10):
+        app.cache_set(("old", i), i, 86400)
+
+    app.cache_set("report", b"{}", 300)
+    assert app.cache_get("report") == b"{}"
+    assert app.cache_get(("old", 0)) is None  # least recently used goes first
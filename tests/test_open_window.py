@@ -0,0 +1,142 @@
+import copy
+from datetime import date, timedelta
+
+import pytest
+import requests
+
+import app
+
+
+def assert_same_aggregates(actual, expected):
+    def same_stats(a, b):
+        assert a.keys() == b.keys()
+        for name, value in b.items():
+            assert a[name] == pytest.approx(value)
+
+    same_stats(actual["totals"], expected["totals"])
+    for dimension in ("client", "driver", "group", "area"):
+        assert actual[dimension].keys() == expected[dimension].keys()
+        for name, stats in expected[dimension].items():
+            same_stats(actual[dimension][name], stats)
+    assert sorted(actual["created"].values()) == sorted(expected["created"].values())
+
+
+def test_upserts_and_removals_match_full_aggregation(make_orders):
+    orders = make_orders(300, date.today())
+    window = app.OpenWindow()
+    window.reset(date.today())
+    for order in orders:
+        window.upsert(copy.deepcopy(order))
+
+    # Change fares, drivers and statuses of some orders, then drop others
+    for order in orders[:100]:
+        order["amount"] = "-9.5"
+        order["pickup_task"]["driver_name"] = "New TALABAT"
+        order["status"] = "failed"
+        window.upsert(copy.deepcopy(order))
+    for order in orders[100:150]:
+        window.upsert(copy.deepcopy(order))  # unchanged
+    for order in orders[250:]:
+        window.remove(order["reference"])
+
+    final = [app.normalize_order(order) for order in orders[:250]]
+    assert len(window.orders) == 250
+    assert_same_aggregates(window.aggregates, app.aggregate_orders(final))
+
+
+def test_full_sync_drops_orders_gone_upstream(make_orders, monkeypatch):
+    orders = make_orders(50, date.today())
+    upstream = [orders]
+    monkeypatch.setattr(
+        app, "fetchTransactions", lambda *args: copy.deepcopy(upstream[0])
+    )
+
+    window = app.OpenWindow()
+    window.sync()
+    upstream[0] = orders[10:]
+    window.sync(force=True)  # a delta sees nothing to remove
+    assert len(window.orders) == 50
+
+    monkeypatch.setattr(app, "TODAY_FULL_SYNC_INTERVAL", 0)
+    window.sync(force=True)
+    assert len(window.orders) == 40
+
+    final = [app.normalize_order(order) for order in orders[10:]]
+    assert_same_aggregates(window.aggregates, app.aggregate_orders(final))
+
+
+def test_failed_first_sync_is_retried(make_orders, monkeypatch):
+    orders = make_orders(20, date.today())
+    calls = []
+
+    def fetch(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise requests.ConnectionError("upstream down")
+        return copy.deepcopy(orders)
+
+    monkeypatch.setattr(app, "fetchTransactions", fetch)
+    window = app.OpenWindow()
+    with pytest.raises(requests.ConnectionError):
+        window.sync()
+
+    window.sync()
+    assert len(window.orders) == 20
+
+
+def test_failed_delta_falls_back_to_full_sync(make_orders, monkeypatch):
+    orders = make_orders(20, date.today())
+    calls = []
+
+    def fetch(start_date, end_date, filter_by):
+        calls.append(start_date)
+        if len(calls) == 2:
+            raise requests.ConnectionError("upstream down")
+        return copy.deepcopy(orders)
+
+    monkeypatch.setattr(app, "fetchTransactions", fetch)
+    window = app.OpenWindow()
+    window.sync()
+    window.sync(force=True)
+
+    today = date.today().isoformat()
+    assert calls[1] != today  # delta slice since the watermark
+    assert calls[2] == today  # full-day fallback
+    assert len(window.orders) == 20
+
+
+def test_delta_near_midnight_keeps_other_days_out(monkeypatch):
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+
+    def order(reference, created):
+        return {
+            "reference": reference,
+            "user_name": "Admin",
+            "amount": "-2",
+            "status": "success",
+            "created_at": created,
+            "pickup_task": {"driver_name": "Ali KEEM", "address": "Sharq"},
+            "delivery_task": {},
+        }
+
+    # Upstream that only honors the date part of the range
+    upstream = [
+        order("T1", f"{today} 00:00:30"),
+        order("Y1", f"{yesterday} 23:59:00"),
+        order("Y2", f"{yesterday} 23:59:50"),
+    ]
+    calls = []
+
+    def fetch(start_date, end_date, filter_by):
+        calls.append(start_date)
+        return copy.deepcopy(upstream)
+
+    monkeypatch.setattr(app, "fetchTransactions", fetch)
+    window = app.OpenWindow()
+    window.sync()
+    window.sync(force=True)
+
+    assert calls[1] == f"{today} 00:00:00"  # delta clamped to today's midnight
+    assert list(window.orders) == ["T1"]
+    assert window.aggregates["totals"]["Orders"] == 1
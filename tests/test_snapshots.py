@@ -0,0 +1,109 @@
+import copy
+import os
+from datetime import date, timedelta
+
+import app
+
+
+def test_orders_round_trip_through_table(make_orders):
+    orders = make_orders(40, date(2025, 3, 1), days=3)
+    orders[0]["amount"] = 12.5  # numbers and lists are stored as JSON
+    orders[1]["tags"] = ["a", "b"]
+    orders[2]["pickup_task"]["driver_name"] = None
+    del orders[3]["delivery_task"]["address"]
+    del orders[4]["user_name"]
+    orders[5]["pickup_task"]["meta"] = {}
+    days = [order["created_at"][:10] for order in orders]
+
+    table = app.orders_to_table(orders, days, sorted(set(days)))
+
+    assert app.table_to_orders(table) == orders
+    assert app.snapshot_days(table) == sorted(set(days))
+
+
+def test_compacted_month_serves_every_day(make_orders, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SNAPSHOT_DIR", str(tmp_path))
+    first = date(2025, 3, 1)
+    orders = make_orders(60, first, days=3)
+    by_day = {first + timedelta(days=i): [] for i in range(4)}  # last day empty
+    for order in orders:
+        by_day[date.fromisoformat(order["created_at"][:10])].append(order)
+    for day, day_orders in by_day.items():
+        app.save_snapshot(day, day_orders)
+
+    app.compact_snapshots(today=date(2025, 6, 1))
+
+    months = {}
+    for day, day_orders in by_day.items():
+        assert not (tmp_path / "days" / f"{day}.arrow").exists()
+        assert app.load_snapshot(day, months) == day_orders
+    assert app.load_snapshot(date(2025, 3, 9), months) is None
+
+
+def test_range_reads_each_month_file_once(make_orders, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "SNAPSHOT_DIR", str(tmp_path))
+    first = date(2025, 3, 1)
+    orders = make_orders(60, first, days=10)
+    for i in range(10):
+        day = first + timedelta(days=i)
+        app.save_snapshot(day, [o for o in orders if o["created_at"][:10] == str(day)])
+    app.compact_snapshots(today=date(2025, 6, 1))
+
+    reads = []
+    read_snapshot_table = app.read_snapshot_table
+    monkeypatch.setattr(
+        app,
+        "read_snapshot_table",
+        lambda path: reads.append(path) or read_snapshot_table(path),
+    )
+    data = app.getSnapshotData("2025-03-01", "2025-03-10")
+
+    assert len(data) == 60
+    assert [os.path.basename(path) for path in reads if "months" in path] == [
+        "2025-03.arrow"
+    ]
+
+
+def test_fetch_and_snapshot_drops_orders_outside_the_range(
+    make_orders, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(app, "SNAPSHOT_DIR", str(tmp_path))
+    first = date(2025, 3, 1)
+    orders = make_orders(30, first, days=3)
+    orders[0]["created_at"] = None
+    monkeypatch.setattr(app, "fetchTransactions", lambda *args: copy.deepcopy(orders))
+
+    kept = app.fetch_and_snapshot(first, first + timedelta(days=1))
+
+    expected = [o for o in orders[1:] if o["created_at"] < "2025-03-03"]
+    assert sorted(o["reference"] for o in kept) == sorted(
+        o["reference"] for o in expected
+    )
+    stored = app.load_snapshot(first) + app.load_snapshot(first + timedelta(days=1))
+    assert sorted(o["reference"] for o in stored) == sorted(
+        o["reference"] for o in expected
+    )
+
+
+def test_expired_days_are_served_live_and_not_stored(
+    make_orders, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(app, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "SNAPSHOT_RETENTION_DAYS", 30)
+    first = date.today() - timedelta(days=35)
+    orders = make_orders(50, first, days=10)
+    calls = []
+
+    def fetch(start_date, end_date, filter_by):
+        calls.append((start_date, end_date))
+        return [o for o in orders if start_date <= o["created_at"][:10] <= end_date]
+
+    monkeypatch.setattr(app, "fetchTransactions", fetch)
+    last = first + timedelta(days=9)
+    data = app.getSnapshotData(first.isoformat(), last.isoformat())
+
+    last_expired = date.today() - timedelta(days=31)
+    assert len(data) == 50
+    assert calls[0] == (first.isoformat(), last_expired.isoformat())
+    stored = sorted(p.name for p in (tmp_path / "days").iterdir())
+    assert stored[0] == f"{last_expired + timedelta(days=1)}.arrow"